@@ -0,0 +1,23 @@
+"""unique index on signature_requests.token_hash
+
+Revision ID: 20261018_signature_request_token_hash_index
+Revises: 20260107_add_document_deleted_at
+Create Date: 2026-10-18 10:00:00
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261018_signature_request_token_hash_index"
+down_revision = "20260107_add_document_deleted_at"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("signature_requests") as batch:
+        batch.create_index("ix_signature_requests_token_hash", ["token_hash"], unique=True)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("signature_requests") as batch:
+        batch.drop_index("ix_signature_requests_token_hash")
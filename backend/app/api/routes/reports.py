@@ -3,7 +3,8 @@ from __future__ import annotations
 from datetime import datetime
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import status as http_status
 from sqlmodel import Session
 
 from app.api.deps import get_current_active_user, get_db
@@ -25,9 +26,18 @@ def list_document_reports(
     search: str | None = Query(default=None, description="Filtro por nome do documento"),
     limit: int = Query(default=200, ge=1, le=1000),
     offset: int = Query(default=0, ge=0),
+    include_parties: bool = Query(default=True, description="Falso retorna apenas os contadores, sem a lista de partes"),
+    cursor_created_at: datetime | None = Query(default=None, description="created_at do next_cursor da página anterior"),
+    cursor_id: UUID | None = Query(default=None, description="document_id do next_cursor da página anterior"),
     session: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ) -> DocumentReportResponse:
+    if (cursor_created_at is None) != (cursor_id is None):
+        # Cursor pela metade voltaria à primeira página e o cliente paginaria em loop.
+        raise HTTPException(
+            status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="cursor_created_at e cursor_id devem ser enviados juntos.",
+        )
     service = ReportingService(session)
     filters = DocumentReportFilters(
         start_date=start_date,
@@ -36,10 +46,12 @@ def list_document_reports(
         area_id=area_id,
         signature_method=signature_method,
         search=search,
+        cursor=(cursor_created_at, cursor_id) if cursor_id is not None else None,
     )
     return service.list_documents(
         tenant_id=current_user.tenant_id,
         filters=filters,
         limit=limit,
         offset=offset,
+        include_parties=include_parties,
     )
@@ -82,6 +82,10 @@ class Settings(BaseSettings):
     icp_signature_reason: str = "Documento assinado com NacionalSign"
     icp_signature_location: Optional[str] = "Brasil"
 
+    # Relatórios de auditoria
+    report_render_workers: int = 0  # > 0 renderiza os PDFs em um pool de processos
+    report_compress: bool = True  # compressão de página: PDFs menores para assinatura, hash, storage e e-mail
+
     # Faturamento / Pagamentos
     billing_default_gateway: str = "pagseguro"
     billing_trial_days: int = 0
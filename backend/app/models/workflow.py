@@ -78,7 +78,7 @@ class SignatureRequest(UUIDModel, TimestampedModel, table=True):
     document_id: UUID = Field(foreign_key="documents.id", index=True)
     group_id: UUID | None = Field(default=None, foreign_key="document_groups.id", index=True)
     token_channel: str | None = Field(default=None)
-    token_hash: str | None = Field(default=None)
+    token_hash: str | None = Field(default=None, index=True, unique=True)
     token_expires_at: Optional[datetime] = Field(default=None)
     status: SignatureRequestStatus = Field(default=SignatureRequestStatus.PENDING)
 
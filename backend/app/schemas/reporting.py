@@ -46,7 +46,13 @@ class DocumentReportRow(BaseModel):
     parties: List[DocumentReportParty]
 
 
+class DocumentReportCursor(BaseModel):
+    created_at: datetime
+    document_id: UUID
+
+
 class DocumentReportResponse(BaseModel):
     items: List[DocumentReportRow]
     total: int
     status_summary: Dict[str, int]
+    next_cursor: DocumentReportCursor | None = None
@@ -1,7 +1,8 @@
 from datetime import datetime
-from typing import Optional
-from uuid import UUID
+from typing import Any, Iterable, Optional
+from uuid import UUID, uuid4
 
+from sqlalchemy import insert
 from sqlmodel import Session, select
 
 from app.models.audit import AuditLog, AuthLog
@@ -52,6 +53,23 @@ class AuditService:
         self.session.add(log)
         self.session.commit()
 
+    def record_events(self, events: Iterable[dict[str, Any]]) -> None:
+        """Grava vários eventos (mesmas chaves de ``record_event``) num único INSERT e commit."""
+        created_at = datetime.utcnow()
+        rows = [
+            {
+                "id": uuid4(),
+                "created_at": created_at,
+                **event,
+                "details": event.get("details") or {},
+            }
+            for event in events
+        ]
+        if not rows:
+            return
+        self.session.exec(insert(AuditLog), params=rows)
+        self.session.commit()
+
     def list_events(
         self,
         tenant_id: UUID | None = None,
@@ -59,10 +59,12 @@ from app.services.storage import (
     get_storage,
     normalize_storage_path,
     resolve_storage_root,
+    set_base_storage_override,
 )
 from app.schemas.signing_agent import SignPdfRequest
 
 BASE_STORAGE = resolve_storage_root()
+set_base_storage_override(BASE_STORAGE)
 _PDF_SUPPORT: tuple[object, object] | None = None
 BRAZIL_TZ = ZoneInfo("America/Sao_Paulo")
 UTC_TZ = ZoneInfo("UTC")
@@ -537,6 +539,10 @@ class DocumentService:
             body_size = 9
             max_text_width = width - 2 * margin
             c.setFont(body_font, body_size)
+            # One text object per page (single BT/ET block) instead of a drawString per line.
+            text = c.beginText(margin, y)
+            text.setFont(body_font, body_size, leading=line_height)
+            text_line = text.textLine
             for line in protocol_lines:
                 wrapped = self._wrap_protocol_line(
                     line=line,
@@ -546,11 +552,16 @@ class DocumentService:
                 )
                 for chunk in wrapped:
                     if y < margin + 40:
+                        c.drawText(text)
                         c.showPage()
                         y = height - margin - 30
                         c.setFont(body_font, body_size)
-                    c.drawString(margin, y, chunk)
+                        text = c.beginText(margin, y)
+                        text.setFont(body_font, body_size, leading=line_height)
+                        text_line = text.textLine
+                    text_line(chunk)
                     y -= line_height
+            c.drawText(text)
 
             c.setFont("Helvetica-Oblique", 8)
             c.setFillColor(colors.HexColor("#4b5563"))
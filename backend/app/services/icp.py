@@ -35,6 +35,12 @@ class TimestampResult:
     issued_at: datetime
     token: bytes
     raw_response: Dict[str, Any] = field(default_factory=dict)
+    token_sha256: str | None = None
+
+    def __post_init__(self) -> None:
+        # Hash the token once when it is obtained; consumers reuse the digest.
+        if self.token_sha256 is None:
+            self.token_sha256 = hashlib.sha256(self.token).hexdigest()
 
 
 @dataclass
@@ -112,10 +118,10 @@ class IcpIntegrationService:
         except Exception:  # pragma: no cover - misconfigured TSA endpoint
             return None
 
-    def request_timestamp(self, payload: bytes) -> TimestampResult:
+    def request_timestamp(self, payload: bytes, *, digest: str | None = None) -> TimestampResult:
         """Request a timestamp token from the configured TSA or fallback locally."""
 
-        digest = hashlib.sha256(payload).hexdigest()
+        digest = digest or hashlib.sha256(payload).hexdigest()
         now = datetime.now(timezone.utc)
 
         if not self.timestamp_url:
@@ -184,8 +190,12 @@ class IcpIntegrationService:
         reason: str | None = None,
         location: str | None = None,
         timestamp: TimestampResult | None = None,
+        pdf_digest: str | None = None,
     ) -> SignatureResult:
-        """Apply a PAdES signature when the certificate is configured."""
+        """Apply a PAdES signature when the certificate is configured.
+
+        ``pdf_digest`` is the SHA-256 hex digest of ``pdf_bytes`` when the caller already has it.
+        """
 
         warnings: list[str] = []
         effective_reason = reason or self.default_reason or "Assinado via NacionalSign"
@@ -196,6 +206,7 @@ class IcpIntegrationService:
                 warnings.append("signer-missing")
             else:
                 warnings.append("pyhanko-missing")
+            pdf_digest = pdf_digest or hashlib.sha256(pdf_bytes).hexdigest()
             fallback_pdf = pdf_bytes
             if PdfWriter and PdfReader:
                 try:
@@ -207,7 +218,7 @@ class IcpIntegrationService:
                     if reader.metadata:
                         metadata.update({k: str(v) for k, v in reader.metadata.items() if v is not None})
                     metadata["/Producer"] = "NacionalSign Fallback"
-                    metadata["/NSDigest"] = hashlib.sha256(pdf_bytes).hexdigest()
+                    metadata["/NSDigest"] = pdf_digest
                     if timestamp and timestamp.issued_at:
                         metadata["/NSIssuedAt"] = timestamp.issued_at.isoformat()
                     writer.add_metadata(metadata)
@@ -218,7 +229,7 @@ class IcpIntegrationService:
                     warnings.append("fallback-metadata-error")
             else:
                 warnings.append("pypdf-missing")
-            sha256 = hashlib.sha256(fallback_pdf).hexdigest()
+            sha256 = pdf_digest if fallback_pdf is pdf_bytes else hashlib.sha256(fallback_pdf).hexdigest()
             return SignatureResult(fallback_pdf, sha256, timestamp, warnings)
 
         buffer = io.BytesIO(pdf_bytes)
@@ -234,7 +245,10 @@ class IcpIntegrationService:
             warnings.append(f"sign-error:{exc}")
             signed_pdf = pdf_bytes
 
-        sha256 = hashlib.sha256(signed_pdf).hexdigest()
+        if signed_pdf is pdf_bytes and pdf_digest:
+            sha256 = pdf_digest
+        else:
+            sha256 = hashlib.sha256(signed_pdf).hexdigest()
         return SignatureResult(signed_pdf, sha256, timestamp, warnings)
 
     def apply_security(
@@ -248,10 +262,12 @@ class IcpIntegrationService:
         """Convenience helper that timestamps and signs the PDF when possible."""
 
         warnings: list[str] = []
+        # One pass over the PDF: the TSA request and the signer share the digest.
+        pdf_digest = hashlib.sha256(pdf_bytes).hexdigest()
         timestamp_result: TimestampResult | None = None
         if request_timestamp:
             try:
-                timestamp_result = self.request_timestamp(pdf_bytes)
+                timestamp_result = self.request_timestamp(pdf_bytes, digest=pdf_digest)
             except Exception as exc:  # pragma: no cover
                 warnings.append(f"timestamp-error:{exc}")
 
@@ -260,6 +276,7 @@ class IcpIntegrationService:
             reason=reason,
             location=location,
             timestamp=timestamp_result,
+            pdf_digest=pdf_digest,
         )
         signature_result.warnings.extend(warnings)
         if signature_result.timestamp is None:
@@ -7,6 +7,7 @@ from dataclasses import dataclass
 from datetime import datetime
 from email.message import EmailMessage
 from email.utils import parseaddr
+from functools import cached_property
 from pathlib import Path
 from typing import Iterable, Optional, Sequence
 from uuid import UUID
@@ -21,6 +22,11 @@ from app.models.customer import Customer
 from app.services.audit import AuditService
 from app.services.storage import resolve_storage_root
 
+try:  # pragma: no cover - optional dependency
+    import pybase64 as _b64  # type: ignore
+except ImportError:  # pragma: no cover - SIMD base64 is optional
+    _b64 = base64
+
 @dataclass
 class EmailConfig:
     host: str
@@ -48,6 +54,11 @@ class EmailAttachment:
     content: bytes
     mime_type: str = "application/pdf"
 
+    @cached_property
+    def base64_content(self) -> str:
+        # Encoded once and reused for every recipient of the same attachment.
+        return _b64.b64encode(self.content).decode("ascii")
+
 logger = logging.getLogger(__name__)
 
 
@@ -815,7 +826,7 @@ class NotificationService:
         if attachments:
             payload["attachments"] = [
                 {
-                    "content": base64.b64encode(item.content).decode("ascii"),
+                    "content": item.base64_content,
                     "type": item.mime_type or "application/octet-stream",
                     "filename": item.filename,
                     "disposition": "attachment",
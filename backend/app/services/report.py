@@ -1,30 +1,312 @@
 from __future__ import annotations
 
-import hashlib
+import copy
 import io
 import json
+import logging
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
+from enum import Enum
+from functools import lru_cache, partial
 from html import escape
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
-from uuid import UUID
+from typing import Dict, Iterable, Iterator, List, Tuple
+from uuid import UUID, uuid4
 
-from reportlab.lib import colors
+from reportlab.lib import colors, rl_accel
 from reportlab.lib.pagesizes import LETTER
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.units import inch
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from sqlalchemy import insert
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 
 from app.core.config import settings
 from app.models.audit import AuditLog
 from app.models.document import AuditArtifact, Document, DocumentParty
-from app.models.workflow import SignatureRequest, SignatureRequestStatus, WorkflowInstance, WorkflowStep
+from app.models.workflow import Signature, SignatureRequest, SignatureRequestStatus, WorkflowInstance, WorkflowStep
 from app.services.icp import IcpIntegrationService
 from app.services.storage import LocalStorage, get_storage, normalize_storage_path, resolve_storage_root
 
+try:  # pragma: no cover - optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - stdlib json is the fallback
+    orjson = None  # type: ignore[assignment]
+
 BASE_STORAGE = resolve_storage_root()
 
+logger = logging.getLogger("nacionalsign.report")
+if not getattr(rl_accel, "_c_funcs", None):
+    # Without the C extension stringWidth/escapePDF/asciiBase85 run in pure Python.
+    logger.warning("Acelerador C do reportlab (rl_accel) indisponível; a geração de relatórios ficará mais lenta")
+LOG_STREAM_BATCH_SIZE = 500
+
+_HTML_ESCAPES = {
+    "&": "&amp;",
+    "<": "&lt;",
+    ">": "&gt;",
+    '"': "&quot;",
+    "'": "&#x27;",
+}
+_HTML_ESCAPE_TABLE = str.maketrans(_HTML_ESCAPES)
+_HTML_TRANSLATE = str.maketrans({**_HTML_ESCAPES, "\n": "<br/>"})
+_LINE_SEPARATOR = "\x00"
+REPORT_PAGE_MARGINS = {
+    "leftMargin": 0.8 * inch,
+    "rightMargin": 0.8 * inch,
+    "topMargin": 1 * inch,
+    "bottomMargin": 0.75 * inch,
+}
+REPORT_FRAME_WIDTH = LETTER[0] - REPORT_PAGE_MARGINS["leftMargin"] - REPORT_PAGE_MARGINS["rightMargin"]
+_EVIDENCE_MODE_LABELS = (
+    ("typed_name", "nome digitado"),
+    ("signature_image", "imagem"),
+    ("signature_draw", "desenho"),
+)
+_PARTY_STATUS_LABELS = {
+    SignatureRequestStatus.SIGNED: "Concluído",
+    SignatureRequestStatus.REFUSED: "Recusado",
+    SignatureRequestStatus.DELEGATED: "Delegado",
+    SignatureRequestStatus.EXPIRED: "Expirado",
+    SignatureRequestStatus.SENT: "Enviado",
+    SignatureRequestStatus.PENDING: "Pendente",
+}
+_render_pool: ProcessPoolExecutor | None = None
+_render_pool_lock = threading.Lock()
+_report_state = threading.local()
+_buffer_pool: queue.LifoQueue[io.BytesIO] = queue.LifoQueue(maxsize=4)
+_stdlib_dump_details = partial(json.dumps, ensure_ascii=False, indent=2)
+
+
+def _dump_details(details: dict) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(details, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:
+            # orjson.JSONEncodeError (TypeError): valores fora do que ele serializa, ex. inteiros > 64 bits.
+            pass
+    return _stdlib_dump_details(details)
+
+
+@lru_cache(maxsize=4096)
+def _fmt_datetime(value: datetime | None) -> str:
+    if not value:
+        return "-"
+    return value.strftime("%d/%m/%Y %H:%M:%S UTC")
+
+
+def _fmt_value(value: object | None) -> str:
+    if value is None or value == "":
+        return "-"
+    return str(value)
+
+
+def _bold_html(safe_text: str) -> str:
+    return f"<b>{safe_text}</b>"
+
+
+def _enum_value(value: object) -> object:
+    return value.value if isinstance(value, Enum) else value
+
+
+def _details_to_html(details: dict | None) -> str:
+    return _dump_details(details or {}).translate(_HTML_TRANSLATE).replace("  ", "&nbsp;&nbsp;")
+
+
+@dataclass(frozen=True)
+class _ReportStyles:
+    title: ParagraphStyle
+    subtitle: ParagraphStyle
+    section: ParagraphStyle
+    body: ParagraphStyle
+    muted: ParagraphStyle
+    table: TableStyle
+    metadata_table: TableStyle
+
+
+def _build_report_styles() -> _ReportStyles:
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        "ReportTitle",
+        parent=styles["Heading1"],
+        alignment=1,
+        fontSize=16,
+        leading=19,
+        textColor=colors.HexColor("#11284b"),
+        spaceAfter=4,
+    )
+    subtitle_style = ParagraphStyle(
+        "ReportSubtitle",
+        parent=styles["BodyText"],
+        alignment=1,
+        fontSize=11,
+        leading=14,
+        textColor=colors.HexColor("#4f5d75"),
+        spaceAfter=12,
+    )
+    section_style = ParagraphStyle(
+        "SectionHeading",
+        parent=styles["Heading2"],
+        fontSize=12,
+        leading=14,
+        textColor=colors.HexColor("#0f5298"),
+        spaceBefore=14,
+        spaceAfter=6,
+    )
+    body_style = ParagraphStyle(
+        "ReportBody",
+        parent=styles["BodyText"],
+        fontSize=10,
+        leading=14,
+        textColor=colors.HexColor("#101820"),
+    )
+    muted_style = ParagraphStyle(
+        "MutedBody",
+        parent=body_style,
+        fontSize=9,
+        textColor=colors.HexColor("#5f6d7a"),
+    )
+    return _ReportStyles(
+        title=title_style,
+        subtitle=subtitle_style,
+        section=section_style,
+        body=body_style,
+        muted=muted_style,
+        table=TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#dce4f2")),
+                ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#102a43")),
+                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("FONTSIZE", (0, 0), (-1, 0), 10),
+                ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
+                ("TOPPADDING", (0, 0), (-1, 0), 6),
+                ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f7f9fc")]),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#c8d1e4")),
+            ]
+        ),
+        metadata_table=TableStyle(
+            [
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("ROWBACKGROUNDS", (0, 0), (-1, -1), [colors.white, colors.HexColor("#f4f6fb")]),
+                ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#d6dbe7")),
+                ("BOX", (0, 0), (-1, -1), 0.5, colors.HexColor("#b7c2d7")),
+                ("LEFTPADDING", (0, 0), (-1, -1), 8),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 8),
+            ]
+        ),
+    )
+
+
+def _report_styles() -> _ReportStyles:
+    styles = getattr(_report_state, "styles", None)
+    if styles is None:
+        styles = _report_state.styles = _build_report_styles()
+    return styles
+
+
+def _acquire_buffer() -> io.BytesIO:
+    try:
+        return _buffer_pool.get_nowait()
+    except queue.Empty:
+        return io.BytesIO()
+
+
+def _release_buffer(buffer: io.BytesIO) -> None:
+    buffer.seek(0)
+    buffer.truncate(0)
+    try:
+        _buffer_pool.put_nowait(buffer)
+    except queue.Full:
+        pass
+
+
+@lru_cache(maxsize=64)
+def _header_prototype(text: str) -> Paragraph:
+    return Paragraph(_bold_html(text.translate(_HTML_ESCAPE_TABLE)), _report_styles().body)
+
+
+def _header_cell(text: str) -> Paragraph:
+    # Paragraphs keep wrap/split state, so tables get a shallow copy; the parsed fragments are shared.
+    return copy.copy(_header_prototype(text))
+
+
+@dataclass(frozen=True)
+class _ReportPageDecorator:
+    """Header/footer callback; kept picklable so rendering can run in a worker process."""
+
+    document_label: str
+    generated_label: str
+
+    def __call__(self, pdf_canvas, doc_template) -> None:  # type: ignore[no-untyped-def]
+        pdf_canvas.saveState()
+        header_y = LETTER[1] - 0.65 * inch
+        footer_y = 0.6 * inch
+        pdf_canvas.setFillColor(colors.HexColor("#102a43"))
+        pdf_canvas.setFont("Helvetica-Bold", 10)
+        pdf_canvas.drawString(doc_template.leftMargin, header_y, "NacionalSign · Relatório de auditoria")
+        pdf_canvas.setFont("Helvetica", 8)
+        pdf_canvas.setFillColor(colors.HexColor("#5c677d"))
+        pdf_canvas.drawRightString(
+            LETTER[0] - doc_template.rightMargin,
+            header_y,
+            self.document_label,
+        )
+        pdf_canvas.drawString(
+            doc_template.leftMargin,
+            footer_y,
+            self.generated_label,
+        )
+        pdf_canvas.drawRightString(
+            LETTER[0] - doc_template.rightMargin,
+            footer_y,
+            f"Página {pdf_canvas.getPageNumber()}",
+        )
+        pdf_canvas.restoreState()
+
+
+def _render_story(story: list, title: str, page_decorator: _ReportPageDecorator) -> bytes:
+    buffer = _acquire_buffer()
+    try:
+        doc = SimpleDocTemplate(
+            buffer,
+            pagesize=LETTER,
+            pageCompression=1 if settings.report_compress else 0,
+            **REPORT_PAGE_MARGINS,
+        )
+        doc.title = title
+        doc.build(story, onFirstPage=page_decorator, onLaterPages=page_decorator)
+        return buffer.getvalue()
+    finally:
+        _release_buffer(buffer)
+
+
+def _get_render_pool() -> ProcessPoolExecutor | None:
+    global _render_pool
+    workers = settings.report_render_workers
+    if workers <= 0:
+        return None
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(max_workers=workers)
+        return _render_pool
+
+
+def render_report_pdf(story: list, *, title: str, page_decorator: _ReportPageDecorator) -> bytes:
+    """
+    Monta o PDF final a partir do story. Com `report_render_workers` > 0 o layout do
+    reportlab roda em um pool de processos, liberando o GIL para as demais requisições.
+    """
+    pool = _get_render_pool()
+    if pool is None:
+        return _render_story(story, title, page_decorator)
+    return pool.submit(_render_story, story, title, page_decorator).result()
+
+
 class ReportService:
     def __init__(self, session: Session, icp_service: IcpIntegrationService | None = None) -> None:
         self.session = session
@@ -56,26 +338,41 @@ class ReportService:
             .order_by(DocumentParty.order_index)
         ).all()
 
-    def _gather_requests(self, workflow: WorkflowInstance) -> Iterable[SignatureRequest]:
+    def _gather_requests(
+        self, workflow: WorkflowInstance
+    ) -> List[Tuple[SignatureRequest, WorkflowStep, DocumentParty | None]]:
+        # Requests, steps and parties in one joined SELECT; signatures via a single selectin batch.
         return self.session.exec(
-            select(SignatureRequest)
-            .join(WorkflowStep)
+            select(SignatureRequest, WorkflowStep, DocumentParty)
+            .join(WorkflowStep, SignatureRequest.workflow_step_id == WorkflowStep.id)
+            .join(DocumentParty, WorkflowStep.party_id == DocumentParty.id, isouter=True)
             .where(WorkflowStep.workflow_id == workflow.id)
             .order_by(WorkflowStep.step_index)
+            .options(selectinload(SignatureRequest.signature))
         ).all()
 
-    def _gather_logs(self, document: Document) -> Iterable[AuditLog]:
-        return self.session.exec(
-            select(AuditLog)
-            .where(AuditLog.document_id == document.id)
-            .order_by(AuditLog.created_at)
-        ).all()
-
-    def _build_step_lookup(self, workflow: WorkflowInstance) -> Dict[UUID, WorkflowStep]:
-        steps = self.session.exec(
-            select(WorkflowStep).where(WorkflowStep.workflow_id == workflow.id)
-        ).all()
-        return {step.id: step for step in steps}
+    def _gather_evidence_artifacts(self, requests: Iterable[SignatureRequest]) -> Dict[UUID, AuditArtifact]:
+        artifact_ids = {
+            signature.evidence_image_artifact_id
+            for request in requests
+            for signature in request.signature or ()
+            if signature.evidence_image_artifact_id
+        }
+        if not artifact_ids:
+            return {}
+        artifacts = self.session.exec(select(AuditArtifact).where(AuditArtifact.id.in_(artifact_ids))).all()
+        return {artifact.id: artifact for artifact in artifacts}
+
+    def _gather_logs(self, document: Document) -> Iterator[AuditLog]:
+        # Only the ORM fetch is batched (yield_per); the caller still builds one row per log for the table.
+        return iter(
+            self.session.exec(
+                select(AuditLog)
+                .where(AuditLog.document_id == document.id)
+                .order_by(AuditLog.created_at)
+                .execution_options(yield_per=LOG_STREAM_BATCH_SIZE)
+            )
+        )
 
     def _collect_party_statuses(
         self,
@@ -112,75 +409,21 @@ class ReportService:
         return resolved
 
     def _build_pdf(self, document: Document, workflow: WorkflowInstance) -> bytes:
-        buffer = io.BytesIO()
         generated_at = datetime.utcnow()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=LETTER,
-            leftMargin=0.8 * inch,
-            rightMargin=0.8 * inch,
-            topMargin=1 * inch,
-            bottomMargin=0.75 * inch,
-            pageCompression=0,
-        )
-        doc.title = f"Relatório {document.name}"
-
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            "ReportTitle",
-            parent=styles["Heading1"],
-            alignment=1,
-            fontSize=16,
-            leading=19,
-            textColor=colors.HexColor("#11284b"),
-            spaceAfter=4,
-        )
-        subtitle_style = ParagraphStyle(
-            "ReportSubtitle",
-            parent=styles["BodyText"],
-            alignment=1,
-            fontSize=11,
-            leading=14,
-            textColor=colors.HexColor("#4f5d75"),
-            spaceAfter=12,
-        )
-        section_style = ParagraphStyle(
-            "SectionHeading",
-            parent=styles["Heading2"],
-            fontSize=12,
-            leading=14,
-            textColor=colors.HexColor("#0f5298"),
-            spaceBefore=14,
-            spaceAfter=6,
-        )
-        body_style = ParagraphStyle(
-            "ReportBody",
-            parent=styles["BodyText"],
-            fontSize=10,
-            leading=14,
-            textColor=colors.HexColor("#101820"),
-        )
-        muted_style = ParagraphStyle(
-            "MutedBody",
-            parent=body_style,
-            fontSize=9,
-            textColor=colors.HexColor("#5f6d7a"),
-        )
-
-        def fmt_datetime(value: datetime | None) -> str:
-            if not value:
-                return "-"
-            return value.strftime("%d/%m/%Y %H:%M:%S UTC")
+        frame_width = REPORT_FRAME_WIDTH
 
-        def fmt_value(value: object | None) -> str:
-            if value is None or value == "":
-                return "-"
-            return str(value)
+        report_styles = _report_styles()
+        title_style = report_styles.title
+        subtitle_style = report_styles.subtitle
+        section_style = report_styles.section
+        body_style = report_styles.body
+        muted_style = report_styles.muted
 
         def lines_to_html(lines: list[str | tuple[str, bool]] | str) -> str:
             if isinstance(lines, str):
-                return escape(lines) if lines else "-"
-            html_parts: list[str] = []
+                return lines.translate(_HTML_ESCAPE_TABLE) if lines else "-"
+            texts: list[str] = []
+            bold_flags: list[bool] = []
             for entry in lines:
                 text = entry
                 bold = False
@@ -188,113 +431,122 @@ class ReportService:
                     text, bold = entry
                 if text in (None, ""):
                     continue
-                safe = escape(str(text))
-                html_parts.append(f"<b>{safe}</b>" if bold else safe)
-            if not html_parts:
-                html_parts.append("-")
-            return "<br/>".join(html_parts)
+                texts.append(str(text))
+                bold_flags.append(bold)
+            if not texts:
+                return "-"
+            joined = _LINE_SEPARATOR.join(texts)
+            if joined.count(_LINE_SEPARATOR) == len(texts) - 1:
+                escaped = joined.translate(_HTML_ESCAPE_TABLE).split(_LINE_SEPARATOR)
+            else:
+                escaped = [text.translate(_HTML_ESCAPE_TABLE) for text in texts]
+            return "<br/>".join(
+                _bold_html(safe) if bold else safe for safe, bold in zip(escaped, bold_flags)
+            )
 
         def lines_to_paragraph(lines: list[str | tuple[str, bool]] | str, style: ParagraphStyle = body_style) -> Paragraph:
             return Paragraph(lines_to_html(lines), style)
 
+        def signature_block_lines(signature: Signature) -> list[str | tuple[str, bool]]:
+            block_lines: list[str | tuple[str, bool]] = [
+                (f"Ação: {_fmt_value(signature.reason) or 'assinatura'}", True),
+                f"Data: {_fmt_datetime(getattr(signature, 'signed_at', None))}",
+                f"IP: {_fmt_value(signature.signer_ip)}",
+            ]
+            evidence_lines: list[str] = []
+            add_evidence = evidence_lines.append
+            option_enabled = (signature.evidence_options or {}).get
+            modes = [label for option, label in _EVIDENCE_MODE_LABELS if option_enabled(option)]
+            if modes:
+                add_evidence(f"Modalidades: {', '.join(modes)}")
+            if signature.typed_name:
+                add_evidence(f"Nome digitado: {signature.typed_name}")
+                if signature.typed_name_hash:
+                    add_evidence(f"Hash do nome: {signature.typed_name_hash}")
+            artifact = evidence_artifacts.get(signature.evidence_image_artifact_id)
+            if artifact:
+                add_evidence(f"Imagem em: {artifact.storage_path}")
+                add_evidence(f"Hash da imagem: {artifact.sha256}")
+                mime = signature.evidence_image_mime_type or "desconhecido"
+                size_display = f"{signature.evidence_image_size or 0} bytes"
+                add_evidence(f"Detalhe: {mime} ({size_display})")
+            if signature.consent_given:
+                consent_line = "Consentimento LGPD: concedido"
+                if signature.consent_version:
+                    consent_line += f" (versão {signature.consent_version})"
+                add_evidence(consent_line)
+                if signature.consent_given_at:
+                    add_evidence(f"Registrado em: {_fmt_datetime(signature.consent_given_at)}")
+            if evidence_lines:
+                block_lines.append("")
+                block_lines.append(("Dados fornecidos:", True))
+                block_lines.extend(evidence_lines)
+            return block_lines
+
         def apply_table_style(table: Table) -> Table:
-            table.setStyle(
-                TableStyle(
-                    [
-                        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#dce4f2")),
-                        ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#102a43")),
-                        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                        ("FONTSIZE", (0, 0), (-1, 0), 10),
-                        ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-                        ("TOPPADDING", (0, 0), (-1, 0), 6),
-                        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f7f9fc")]),
-                        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                        ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#c8d1e4")),
-                    ]
-                )
-            )
+            table.setStyle(report_styles.table)
             return table
 
         story: list = []
         story.append(Paragraph("Relatório de auditoria", title_style))
-        subtitle = f"Documento {escape(fmt_value(document.name))} · ID {escape(fmt_value(document.id))}"
+        subtitle = f"Documento {escape(_fmt_value(document.name))} · ID {escape(_fmt_value(document.id))}"
         story.append(Paragraph(subtitle, subtitle_style))
         story.append(lines_to_paragraph("Todos os horários listados estão no fuso UTC.", muted_style))
         story.append(Spacer(1, 14))
 
         metadata = [
-            ("Documento ID", fmt_value(document.id)),
-            ("Status final", fmt_value(getattr(document.status, "value", document.status))),
-            ("Workflow ID", fmt_value(workflow.id)),
-            ("Gerado em", fmt_datetime(generated_at)),
+            ("Documento ID", _fmt_value(document.id)),
+            ("Status final", _fmt_value(_enum_value(document.status))),
+            ("Workflow ID", _fmt_value(workflow.id)),
+            ("Gerado em", _fmt_datetime(generated_at)),
         ]
         metadata_table = Table(
             [
-                [Paragraph(f"<b>{escape(label)}</b>", body_style), Paragraph(escape(value), body_style)]
+                [Paragraph(_bold_html(escape(label)), body_style), Paragraph(escape(value), body_style)]
                 for label, value in metadata
             ],
-            colWidths=[doc.width * 0.35, doc.width * 0.65],
+            colWidths=[frame_width * 0.35, frame_width * 0.65],
             hAlign="LEFT",
         )
-        metadata_table.setStyle(
-            TableStyle(
-                [
-                    ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                    ("ROWBACKGROUNDS", (0, 0), (-1, -1), [colors.white, colors.HexColor("#f4f6fb")]),
-                    ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#d6dbe7")),
-                    ("BOX", (0, 0), (-1, -1), 0.5, colors.HexColor("#b7c2d7")),
-                    ("LEFTPADDING", (0, 0), (-1, -1), 8),
-                    ("RIGHTPADDING", (0, 0), (-1, -1), 8),
-                ]
-            )
-        )
+        metadata_table.setStyle(report_styles.metadata_table)
         story.append(metadata_table)
         story.append(Spacer(1, 10))
 
         parties = list(self._gather_parties(document))
         party_lookup = {party.id: party for party in parties if party.id}
-        requests = list(self._gather_requests(workflow))
-        steps_by_id = self._build_step_lookup(workflow)
+        request_entries = self._gather_requests(workflow)
+        requests = [request for request, _step, _party in request_entries]
+        steps_by_id = {step.id: step for _request, step, _party in request_entries}
+        evidence_artifacts = self._gather_evidence_artifacts(requests)
         party_request_statuses = self._collect_party_statuses(party_lookup, requests, steps_by_id)
-        party_status_labels = {
-            SignatureRequestStatus.SIGNED: "Concluído",
-            SignatureRequestStatus.REFUSED: "Recusado",
-            SignatureRequestStatus.DELEGATED: "Delegado",
-            SignatureRequestStatus.EXPIRED: "Expirado",
-            SignatureRequestStatus.SENT: "Enviado",
-            SignatureRequestStatus.PENDING: "Pendente",
-        }
         story.append(Paragraph("Participantes", section_style))
         if parties:
-            party_rows = [
-                [
-                    Paragraph("<b>Participante</b>", body_style),
-                    Paragraph("<b>Contato</b>", body_style),
-                    Paragraph("<b>Status</b>", body_style),
-                ]
+            party_rows: list = [None] * (len(parties) + 1)
+            party_rows[0] = [
+                _header_cell("Participante"),
+                _header_cell("Contato"),
+                _header_cell("Status"),
             ]
-            for party in parties:
+            for row_index, party in enumerate(parties, 1):
                 contact_lines: list[str] = []
                 if party.email:
                     contact_lines.append(f"Email: {party.email}")
                 if party.phone_number:
                     contact_lines.append(f"Telefone: {party.phone_number}")
-                contact_lines.append(f"Função: {fmt_value(party.role)}")
+                contact_lines.append(f"Função: {_fmt_value(party.role)}")
                 derived_status = party_request_statuses.get(party.id)
                 if derived_status:
-                    status_value = party_status_labels.get(derived_status, getattr(derived_status, 'value', derived_status))
+                    status_value = _PARTY_STATUS_LABELS.get(derived_status) or _enum_value(derived_status)
                 else:
-                    status_value = getattr(party.status, 'value', party.status)
-                party_rows.append(
-                    [
-                        lines_to_paragraph([(fmt_value(party.full_name), True)]),
-                        lines_to_paragraph(contact_lines),
-                        lines_to_paragraph([fmt_value(status_value)]),
-                    ]
-                )
+                    status_value = _enum_value(party.status)
+                party_rows[row_index] = [
+                    lines_to_paragraph([(_fmt_value(party.full_name), True)]),
+                    lines_to_paragraph(contact_lines),
+                    lines_to_paragraph([_fmt_value(status_value)]),
+                ]
             party_table = Table(
                 party_rows,
-                colWidths=[doc.width * 0.35, doc.width * 0.4, doc.width * 0.25],
+                colWidths=[frame_width * 0.35, frame_width * 0.4, frame_width * 0.25],
                 hAlign="LEFT",
                 repeatRows=1,
             )
@@ -305,78 +557,35 @@ class ReportService:
 
         story.append(Paragraph("Solicitações", section_style))
         if requests:
-            request_rows = [
-                [
-                    Paragraph("<b>Solicitação</b>", body_style),
-                    Paragraph("<b>Detalhes</b>", body_style),
-                    Paragraph("<b>Assinaturas</b>", body_style),
-                ]
+            request_rows: list = [None] * (len(requests) + 1)
+            request_rows[0] = [
+                _header_cell("Solicitação"),
+                _header_cell("Detalhes"),
+                _header_cell("Assinaturas"),
             ]
-            for request in requests:
-                step = steps_by_id.get(request.workflow_step_id)
-                party = party_lookup.get(getattr(step, "party_id", None)) if step else None
+            # Every empty signatures cell shares one "-" paragraph; they all wrap to the same column width.
+            dash_paragraph = Paragraph("-", body_style)
+            for row_index, (request, step, party) in enumerate(request_entries, 1):
                 details_lines: list[str | tuple[str, bool]] = [
-                    (f"Parte: {fmt_value(party.full_name if party else '-')}", True),
-                    f"Status: {fmt_value(getattr(request.status, 'value', request.status))}",
-                    f"Canal: {fmt_value(request.token_channel)}",
-                    f"Emitido em: {fmt_datetime(request.created_at)}",
+                    (f"Parte: {_fmt_value(party.full_name if party else '-')}", True),
+                    f"Status: {_fmt_value(_enum_value(request.status))}",
+                    f"Canal: {_fmt_value(request.token_channel)}",
+                    f"Emitido em: {_fmt_datetime(request.created_at)}",
                 ]
-                signature_blocks: list[str] = []
-                for signature in request.signature or []:
-                    block_lines: list[str | tuple[str, bool]] = [
-                        (f"Ação: {fmt_value(signature.reason) or 'assinatura'}", True),
-                        f"Data: {fmt_datetime(getattr(signature, 'signed_at', None))}",
-                        f"IP: {fmt_value(signature.signer_ip)}",
-                    ]
-                    evidence_lines: list[str] = []
-                    options = signature.evidence_options or {}
-                    modes: list[str] = []
-                    if options.get("typed_name"):
-                        modes.append("nome digitado")
-                    if options.get("signature_image"):
-                        modes.append("imagem")
-                    if options.get("signature_draw"):
-                        modes.append("desenho")
-                    if modes:
-                        evidence_lines.append("Modalidades: " + ", ".join(modes))
-                    if signature.typed_name:
-                        evidence_lines.append(f"Nome digitado: {signature.typed_name}")
-                        if signature.typed_name_hash:
-                            evidence_lines.append(f"Hash do nome: {signature.typed_name_hash}")
-                    artifact = None
-                    if signature.evidence_image_artifact_id:
-                        artifact = self.session.get(AuditArtifact, signature.evidence_image_artifact_id)
-                    if artifact:
-                        evidence_lines.append(f"Imagem em: {artifact.storage_path}")
-                        evidence_lines.append(f"Hash da imagem: {artifact.sha256}")
-                        mime = signature.evidence_image_mime_type or "desconhecido"
-                        size_display = f"{signature.evidence_image_size or 0} bytes"
-                        evidence_lines.append(f"Detalhe: {mime} ({size_display})")
-                    if signature.consent_given:
-                        consent_line = "Consentimento LGPD: concedido"
-                        if signature.consent_version:
-                            consent_line += f" (versão {signature.consent_version})"
-                        evidence_lines.append(consent_line)
-                        if signature.consent_given_at:
-                            evidence_lines.append(f"Registrado em: {fmt_datetime(signature.consent_given_at)}")
-                    if evidence_lines:
-                        block_lines.append("")
-                        block_lines.append(("Dados fornecidos:", True))
-                        block_lines.extend(evidence_lines)
-                    signature_blocks.append(lines_to_html(block_lines))
-                signatures_cell = Paragraph("-", body_style)
-                if signature_blocks:
-                    signatures_cell = Paragraph("<br/><br/>".join(signature_blocks), body_style)
-                request_rows.append(
-                    [
-                        lines_to_paragraph([f"Solicitação {request.id}", f"Etapa: {fmt_value(getattr(step, 'step_index', '-'))}"]),
-                        lines_to_paragraph(details_lines),
-                        signatures_cell,
-                    ]
+                signature_blocks = [
+                    lines_to_html(signature_block_lines(signature)) for signature in request.signature or ()
+                ]
+                signatures_cell = (
+                    Paragraph("<br/><br/>".join(signature_blocks), body_style) if signature_blocks else dash_paragraph
                 )
+                request_rows[row_index] = [
+                    lines_to_paragraph([f"Solicitação {request.id}", f"Etapa: {_fmt_value(getattr(step, 'step_index', '-'))}"]),
+                    lines_to_paragraph(details_lines),
+                    signatures_cell,
+                ]
             request_table = Table(
                 request_rows,
-                colWidths=[doc.width * 0.22, doc.width * 0.35, doc.width * 0.43],
+                colWidths=[frame_width * 0.22, frame_width * 0.35, frame_width * 0.43],
                 hAlign="LEFT",
                 repeatRows=1,
             )
@@ -385,29 +594,27 @@ class ReportService:
             story.append(lines_to_paragraph(["Nenhuma solicitação registrada."], muted_style))
         story.append(Spacer(1, 6))
 
-        logs = list(self._gather_logs(document))
         story.append(Paragraph("Eventos de auditoria", section_style))
-        if logs:
-            log_rows = [
+        log_rows = [
+            [
+                _header_cell("Horário"),
+                _header_cell("Evento"),
+                _header_cell("Detalhes"),
+            ]
+        ]
+        add_log_row = log_rows.append
+        for log in self._gather_logs(document):
+            add_log_row(
                 [
-                    Paragraph("<b>Horário</b>", body_style),
-                    Paragraph("<b>Evento</b>", body_style),
-                    Paragraph("<b>Detalhes</b>", body_style),
+                    lines_to_paragraph([_fmt_datetime(log.created_at)]),
+                    lines_to_paragraph([log.event_type]),
+                    Paragraph(_details_to_html(log.details), body_style),
                 ]
-            ]
-            for log in logs:
-                detail_text = json.dumps(log.details or {}, ensure_ascii=False, indent=2)
-                detail_html = escape(detail_text).replace("\n", "<br/>").replace("  ", "&nbsp;&nbsp;")
-                log_rows.append(
-                    [
-                        lines_to_paragraph([fmt_datetime(log.created_at)]),
-                        lines_to_paragraph([log.event_type]),
-                        Paragraph(detail_html, body_style),
-                    ]
-                )
+            )
+        if len(log_rows) > 1:
             log_table = Table(
                 log_rows,
-                colWidths=[doc.width * 0.25, doc.width * 0.2, doc.width * 0.55],
+                colWidths=[frame_width * 0.25, frame_width * 0.2, frame_width * 0.55],
                 hAlign="LEFT",
                 repeatRows=1,
             )
@@ -417,45 +624,31 @@ class ReportService:
 
         story.append(Spacer(1, 12))
 
-        def draw_header_footer(pdf_canvas, doc_template) -> None:
-            pdf_canvas.saveState()
-            header_y = LETTER[1] - 0.65 * inch
-            footer_y = 0.6 * inch
-            pdf_canvas.setFillColor(colors.HexColor("#102a43"))
-            pdf_canvas.setFont("Helvetica-Bold", 10)
-            pdf_canvas.drawString(doc_template.leftMargin, header_y, "NacionalSign · Relatório de auditoria")
-            pdf_canvas.setFont("Helvetica", 8)
-            pdf_canvas.setFillColor(colors.HexColor("#5c677d"))
-            pdf_canvas.drawRightString(
-                LETTER[0] - doc_template.rightMargin,
-                header_y,
-                f"Documento {document.id}",
-            )
-            pdf_canvas.drawString(
-                doc_template.leftMargin,
-                footer_y,
-                f"Gerado em {fmt_datetime(generated_at)}",
-            )
-            pdf_canvas.drawRightString(
-                LETTER[0] - doc_template.rightMargin,
-                footer_y,
-                f"Página {pdf_canvas.getPageNumber()}",
-            )
-            pdf_canvas.restoreState()
+        page_decorator = _ReportPageDecorator(
+            document_label=f"Documento {document.id}",
+            generated_label=f"Gerado em {_fmt_datetime(generated_at)}",
+        )
+        return render_report_pdf(story, title=f"Relatório {document.name}", page_decorator=page_decorator)
 
-        doc.build(story, onFirstPage=draw_header_footer, onLaterPages=draw_header_footer)
-        buffer.seek(0)
-        return buffer.getvalue()
     def _persist_warnings(self, document: Document, warnings: List[str]) -> None:
         if not warnings:
             return
-        for warning in warnings:
-            log_entry = AuditLog(
-                document_id=document.id,
-                event_type="icp_warning",
-                details={"warning": warning},
-            )
-            self.session.add(log_entry)
+        # Um único INSERT executemany, sem passar cada AuditLog pela unit of work do ORM.
+        # id/created_at vêm de default_factory do modelo, então são preenchidos aqui.
+        created_at = datetime.utcnow()
+        self.session.exec(
+            insert(AuditLog),
+            params=[
+                {
+                    "id": uuid4(),
+                    "created_at": created_at,
+                    "document_id": document.id,
+                    "event_type": "icp_warning",
+                    "details": {"warning": warning},
+                }
+                for warning in warnings
+            ],
+        )
         self.session.commit()
 
     def generate_final_report(self, document: Document, workflow: WorkflowInstance) -> Tuple[AuditArtifact, List[AuditArtifact]]:
@@ -468,15 +661,21 @@ class ReportService:
         )
 
         storage = self._get_storage_backend()
-        base_dir = resolve_storage_root()
-        root_path = Path("reports") / str(document.tenant_id) / str(document.id)
-        (base_dir / root_path).mkdir(parents=True, exist_ok=True)
-        root = root_path.as_posix()
-        file_path_str = storage.save_bytes(
-            root=root,
-            name="relatorio-final.pdf",
-            data=signature.signed_pdf,
-        )
+        # LocalStorage.save_bytes cria o diretório; não há o que preparar aqui.
+        root = f"reports/{document.tenant_id}/{document.id}"
+        token = signature.timestamp.token if signature.timestamp else None
+        save_pdf = partial(storage.save_bytes, root=root, name="relatorio-final.pdf", data=signature.signed_pdf)
+        save_token = partial(storage.save_bytes, root=root, name="relatorio-final.tsr", data=token) if token else None
+        if save_token is not None and isinstance(storage, LocalStorage):
+            # Arquivos distintos no disco: as duas gravações são independentes.
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                pdf_future = pool.submit(save_pdf)
+                token_future = pool.submit(save_token)
+                file_path_str = pdf_future.result()
+                token_path_str = token_future.result()
+        else:
+            file_path_str = save_pdf()
+            token_path_str = save_token() if save_token is not None else None
         file_path_str = normalize_storage_path(file_path_str)
 
         issued_at = signature.timestamp.issued_at.replace(tzinfo=None) if signature.timestamp else datetime.utcnow()
@@ -491,18 +690,13 @@ class ReportService:
         extra_artifacts: List[AuditArtifact] = []
         self.session.add(main_artifact)
 
-        if signature.timestamp and signature.timestamp.token:
-            token_path_str = storage.save_bytes(
-                root=root,
-                name="relatorio-final.tsr",
-                data=signature.timestamp.token,
-            )
+        if token_path_str is not None:
             token_path_str = normalize_storage_path(token_path_str)
             timestamp_artifact = AuditArtifact(
                 document_id=document.id,
                 artifact_type="final_report_timestamp",
                 storage_path=token_path_str,
-                sha256=hashlib.sha256(signature.timestamp.token).hexdigest(),
+                sha256=signature.timestamp.token_sha256,
                 issued_at=issued_at,
             )
             self.session.add(timestamp_artifact)
@@ -2,9 +2,10 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, List, Tuple
 from uuid import UUID
 
+from sqlalchemy import case, exists, tuple_
 from sqlmodel import Session, select, func
 
 from app.models.document import Document, DocumentParty, DocumentStatus
@@ -17,7 +18,7 @@ from app.models.workflow import (
 )
 from app.models.tenant import Area
 from app.models.user import User
-from app.schemas.reporting import DocumentReportParty, DocumentReportResponse, DocumentReportRow
+from app.schemas.reporting import DocumentReportCursor, DocumentReportParty, DocumentReportResponse, DocumentReportRow
 
 
 @dataclass
@@ -28,6 +29,8 @@ class DocumentReportFilters:
     area_id: UUID | None = None
     signature_method: str | None = None
     search: str | None = None
+    # Keyset: (created_at, id) do último documento da página anterior.
+    cursor: tuple[datetime, UUID] | None = None
 
 
 class ReportingService:
@@ -41,6 +44,7 @@ class ReportingService:
         *,
         limit: int = 200,
         offset: int = 0,
+        include_parties: bool = True,
     ) -> DocumentReportResponse:
         conditions = [Document.tenant_id == tenant_id]
 
@@ -57,15 +61,12 @@ class ReportingService:
             conditions.append(func.lower(Document.name).like(normalized))
         if filters.signature_method:
             method = filters.signature_method.strip().lower()
-            method_query = (
-                select(DocumentParty.document_id)
+            conditions.append(
+                exists()
+                .where(DocumentParty.document_id == Document.id)
                 .where(DocumentParty.signature_method.isnot(None))
                 .where(func.lower(DocumentParty.signature_method).like(f"{method}%"))
             )
-            conditions.append(Document.id.in_(method_query))
-
-        total_stmt = select(func.count()).select_from(Document).where(*conditions)
-        total = self.session.exec(total_stmt).one()
 
         summary_stmt = (
             select(Document.status, func.count())
@@ -76,55 +77,61 @@ class ReportingService:
             (status.value if isinstance(status, DocumentStatus) else str(status)): count
             for status, count in self.session.exec(summary_stmt).all()
         }
+        # Os grupos por status particionam o mesmo filtro: a soma é o total, sem outro COUNT(*).
+        total = sum(status_summary.values())
 
         document_stmt = (
             select(Document, Area, User)
             .join(Area, Area.id == Document.area_id)
             .join(User, User.id == Document.created_by_id)
             .where(*conditions)
-            .order_by(Document.created_at.desc())
-            .offset(offset)
+            .order_by(Document.created_at.desc(), Document.id.desc())
             .limit(limit)
         )
+        if filters.cursor:
+            # Continua a partir do cursor em vez de descartar linhas com OFFSET.
+            document_stmt = document_stmt.where(tuple_(Document.created_at, Document.id) < tuple(filters.cursor))
+        elif offset:
+            document_stmt = document_stmt.offset(offset)
 
         raw_rows = self.session.exec(document_stmt).all()
         if not raw_rows:
-            return DocumentReportResponse(items=[], total=int(total or 0), status_summary=status_summary)
-
-        documents: List[Document] = []
-        areas: Dict[UUID, Area] = {}
-        creators: Dict[UUID, User] = {}
-        document_ids: List[UUID] = []
-        for document, area, user in raw_rows:
-            documents.append(document)
-            areas[document.id] = area
-            creators[document.id] = user
-            document_ids.append(document.id)
+            return DocumentReportResponse(items=[], total=total, status_summary=status_summary)
+
+        document_ids = [document.id for document, _area, _creator in raw_rows]
 
         workflows = self._load_latest_workflows(document_ids)
-        parties_map = self._load_parties_with_signatures(document_ids)
+        if include_parties:
+            parties_map = self._load_parties_with_signatures(document_ids)
+            counters_map: Dict[UUID, Tuple[int, int, int, int]] = {}
+        else:
+            # Somente resumo: os contadores saem agregados do banco, sem carregar as partes.
+            parties_map = {}
+            counters_map = self._load_party_counters(document_ids)
 
         items: List[DocumentReportRow] = []
-        for document in documents:
+        for document, area, creator in raw_rows:
             doc_parties = parties_map.get(document.id, [])
-            signed_parties = sum(1 for party in doc_parties if party.signed_at)
-            total_parties = len(doc_parties)
+            if include_parties:
+                signed_parties = signed_digital = signed_electronic = 0
+                for party in doc_parties:
+                    if not party.signed_at:
+                        continue
+                    signed_parties += 1
+                    # Mesma normalização do resumo agregado (lower/trim no SQL).
+                    kind = party.signature_type or (party.signature_method or "").strip().lower()
+                    if kind.startswith("digital"):
+                        signed_digital += 1
+                    elif kind.startswith("electronic"):
+                        signed_electronic += 1
+                total_parties = len(doc_parties)
+            else:
+                total_parties, signed_parties, signed_digital, signed_electronic = counters_map.get(
+                    document.id, (0, 0, 0, 0)
+                )
             pending_parties = max(total_parties - signed_parties, 0)
 
-            signed_digital = sum(
-                1
-                for party in doc_parties
-                if party.signed_at and (party.signature_type or party.signature_method or "").startswith("digital")
-            )
-            signed_electronic = sum(
-                1
-                for party in doc_parties
-                if party.signed_at and (party.signature_type or party.signature_method or "").startswith("electronic")
-            )
-
             workflow = workflows.get(document.id)
-            creator = creators.get(document.id)
-            area = areas.get(document.id)
 
             items.append(
                 DocumentReportRow(
@@ -149,29 +156,44 @@ class ReportingService:
                 )
             )
 
+        next_cursor = None
+        if len(raw_rows) == limit:
+            last = raw_rows[-1][0]
+            next_cursor = DocumentReportCursor(created_at=last.created_at, document_id=last.id)
+
         return DocumentReportResponse(
             items=items,
-            total=int(total or 0),
+            total=total,
+            next_cursor=next_cursor,
             status_summary=status_summary,
         )
 
     def _load_latest_workflows(self, document_ids: Iterable[UUID]) -> Dict[UUID, WorkflowInstance]:
         if not document_ids:
             return {}
+        # Só o workflow mais recente de cada documento sai do banco (row_number por documento).
+        ranked = (
+            select(
+                WorkflowInstance.id,
+                func.row_number()
+                .over(
+                    partition_by=WorkflowInstance.document_id,
+                    order_by=(
+                        WorkflowInstance.started_at.desc().nullslast(),
+                        WorkflowInstance.created_at.desc(),
+                    ),
+                )
+                .label("rn"),
+            )
+            .where(WorkflowInstance.document_id.in_(document_ids))
+            .subquery()
+        )
         workflow_stmt = (
             select(WorkflowInstance)
-            .where(WorkflowInstance.document_id.in_(document_ids))
-            .order_by(
-                WorkflowInstance.document_id,
-                WorkflowInstance.started_at.desc().nullslast(),
-                WorkflowInstance.created_at.desc(),
-            )
+            .join(ranked, ranked.c.id == WorkflowInstance.id)
+            .where(ranked.c.rn == 1)
         )
-        workflows: Dict[UUID, WorkflowInstance] = {}
-        for workflow in self.session.exec(workflow_stmt):
-            if workflow.document_id not in workflows:
-                workflows[workflow.document_id] = workflow
-        return workflows
+        return {workflow.document_id: workflow for workflow in self.session.exec(workflow_stmt)}
 
     def _load_parties_with_signatures(self, document_ids: Iterable[UUID]) -> Dict[UUID, List[DocumentReportParty]]:
         party_stmt = (
@@ -219,20 +241,83 @@ class ReportingService:
 
         return result
 
+    def _load_party_counters(self, document_ids: Iterable[UUID]) -> Dict[UUID, Tuple[int, int, int, int]]:
+        """Return (total, signed, signed_digital, signed_electronic) party counts per document."""
+        if not document_ids:
+            return {}
+
+        # Mesma regra da listagem completa: cada parte é classificada pela assinatura mais recente
+        # (row_number por parte), com fallback para o signature_method cadastrado.
+        ranked = (
+            select(
+                WorkflowStep.party_id,
+                Signature.signature_type,
+                func.row_number()
+                .over(
+                    partition_by=WorkflowStep.party_id,
+                    order_by=(Signature.signed_at.desc(), Signature.created_at.desc()),
+                )
+                .label("rn"),
+            )
+            .join(SignatureRequest, Signature.signature_request_id == SignatureRequest.id)
+            .join(WorkflowStep, SignatureRequest.workflow_step_id == WorkflowStep.id)
+            .join(DocumentParty, WorkflowStep.party_id == DocumentParty.id)
+            .where(DocumentParty.document_id.in_(document_ids))
+            .where(Signature.signed_at.isnot(None))
+            .subquery()
+        )
+        signed = ranked.c.party_id.isnot(None)
+        untyped = signed & ranked.c.signature_type.is_(None)
+        # Normalizado como na listagem completa: o LIKE do SQLite ignora caixa, o do PostgreSQL não.
+        method_label = func.lower(func.trim(DocumentParty.signature_method))
+        is_digital = (ranked.c.signature_type == SignatureType.DIGITAL) | (
+            untyped & method_label.startswith("digital")
+        )
+        is_electronic = (ranked.c.signature_type == SignatureType.ELECTRONIC) | (
+            untyped & method_label.startswith("electronic")
+        )
+        counters_stmt = (
+            select(
+                DocumentParty.document_id,
+                func.count(DocumentParty.id),
+                func.count(ranked.c.party_id),
+                func.sum(case((is_digital, 1), else_=0)),
+                func.sum(case((is_electronic, 1), else_=0)),
+            )
+            .outerjoin(ranked, (ranked.c.party_id == DocumentParty.id) & (ranked.c.rn == 1))
+            .where(DocumentParty.document_id.in_(document_ids))
+            .group_by(DocumentParty.document_id)
+        )
+        return {
+            document_id: (int(total), int(signed), int(digital), int(electronic))
+            for document_id, total, signed, digital, electronic in self.session.exec(counters_stmt).all()
+        }
+
     def _load_signatures_for_parties(self, party_ids: Iterable[UUID]) -> Dict[UUID, Signature]:
         if not party_ids:
             return {}
 
-        signature_stmt = (
-            select(Signature, WorkflowStep.party_id)
+        # Uma linha por parte: a assinatura mais recente, ranqueada no banco.
+        ranked = (
+            select(
+                Signature.id,
+                WorkflowStep.party_id,
+                func.row_number()
+                .over(
+                    partition_by=WorkflowStep.party_id,
+                    order_by=(Signature.signed_at.desc(), Signature.created_at.desc()),
+                )
+                .label("rn"),
+            )
             .join(SignatureRequest, Signature.signature_request_id == SignatureRequest.id)
             .join(WorkflowStep, SignatureRequest.workflow_step_id == WorkflowStep.id)
             .where(WorkflowStep.party_id.in_(party_ids))
             .where(Signature.signed_at.isnot(None))
-            .order_by(Signature.signed_at.desc(), Signature.created_at.desc())
+            .subquery()
+        )
+        signature_stmt = (
+            select(Signature, ranked.c.party_id)
+            .join(ranked, ranked.c.id == Signature.id)
+            .where(ranked.c.rn == 1)
         )
-        signature_map: Dict[UUID, Signature] = {}
-        for signature, party_id in self.session.exec(signature_stmt).all():
-            if party_id not in signature_map:
-                signature_map[party_id] = signature
-        return signature_map
+        return {party_id: signature for signature, party_id in self.session.exec(signature_stmt).all()}
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import base64
 import json
+from functools import lru_cache
 from typing import Any, Dict, Iterable, Optional
 
 import httpx
@@ -24,6 +25,12 @@ class SigningAgentError(RuntimeError):
         self.status_code = status_code
 
 
+@lru_cache(maxsize=8)
+def _http_client(base_url: str, timeout: float) -> httpx.Client:
+    """Cliente httpx compartilhado por URL do agente (pool de conexões com keep-alive)."""
+    return httpx.Client(base_url=base_url, timeout=timeout)
+
+
 class SigningAgentClient:
     """Cliente HTTP para comunicação com o agente de assinatura local."""
 
@@ -37,20 +44,15 @@ class SigningAgentClient:
         if not self._base_url:
             raise SigningAgentError("URL base do agente de assinatura não configurada.")
         self._timeout = timeout_seconds or settings.signing_agent_timeout_seconds or 10.0
+        # As instâncias são criadas por chamada; o pool vive no processo e reaproveita conexões.
+        self._client = _http_client(self._base_url, self._timeout)
 
     # ======================================================================================
     #     REQUISIÇÃO ROBUSTA — TRATAMENTO SEGURO E COMPATÍVEL COM O DOCUMENTSERVICE
     # ======================================================================================
     def _request(self, method: str, path: str, *, json: dict[str, Any] | None = None) -> dict[str, Any]:
-        url = f"{self._base_url}{path}"
-
         try:
-            response = httpx.request(
-                method,
-                url,
-                json=json,
-                timeout=self._timeout,
-            )
+            response = self._client.request(method, path, json=json)
         except httpx.RequestError as exc:
             raise SigningAgentError(f"Falha ao conectar com o agente local: {exc}") from exc
 
@@ -67,6 +69,26 @@ class SigningAgentClient:
             msg = str(payload.get("error") or payload.get("detail") or "Erro no agente de assinatura.")
             raise SigningAgentError(msg, details=payload, status_code=response.status_code)
 
+        # -----------------------------
+        # Content-Type informado: despacha direto, sem sondar o corpo
+        # -----------------------------
+        content_type = response.headers.get("content-type", "").lower()
+        if "json" in content_type:
+            try:
+                return response.json()
+            except Exception:
+                pass
+        elif "pdf" in content_type:
+            return {
+                "pdf": base64.b64encode(content).decode("utf-8"),
+                "p7s": None,
+            }
+        elif "xml" in content_type or "pkcs7" in content_type:
+            return {
+                "pdf": None,
+                "p7s": base64.b64encode(content).decode("utf-8"),
+            }
+
         # -----------------------------
         # JSON normal
         # -----------------------------
@@ -107,8 +129,9 @@ class SigningAgentClient:
         # Conteúdo BASE64 que contém PDF
         # -----------------------------
         try:
-            raw = base64.b64decode(content)
-            if raw.startswith(b"%PDF"):
+            # 12 caracteres base64 = 9 bytes: basta para ver o cabeçalho sem decodificar o corpo inteiro.
+            head = base64.b64decode(stripped[:12], validate=False)
+            if head.startswith(b"%PDF"):
                 return {
                     "pdf": content.decode("utf-8"),
                     "p7s": None,
@@ -165,24 +188,23 @@ def build_sign_pdf_payload(
         "payload": base64.b64encode(pdf_bytes).decode("utf-8")
     }
 
-    def add_if(k, v):
-        if v is not None:
-            payload[k] = v
-
-    add_if("certIndex", cert_index)
-    add_if("thumbprint", thumbprint)
-    add_if("protocol", protocol)
-    add_if("watermark", watermark)
-    add_if("footerNote", footer_note)
-    add_if("signatureType", signature_type)
-    add_if("authentication", authentication)
-    add_if("certificateDescription", certificate_description)
-    add_if("tokenInfo", token_info)
-    add_if("signaturePage", signature_page)
-    add_if("signatureWidth", signature_width)
-    add_if("signatureHeight", signature_height)
-    add_if("signatureMarginX", signature_margin_x)
-    add_if("signatureMarginY", signature_margin_y)
+    options = (
+        ("certIndex", cert_index),
+        ("thumbprint", thumbprint),
+        ("protocol", protocol),
+        ("watermark", watermark),
+        ("footerNote", footer_note),
+        ("signatureType", signature_type),
+        ("authentication", authentication),
+        ("certificateDescription", certificate_description),
+        ("tokenInfo", token_info),
+        ("signaturePage", signature_page),
+        ("signatureWidth", signature_width),
+        ("signatureHeight", signature_height),
+        ("signatureMarginX", signature_margin_x),
+        ("signatureMarginY", signature_margin_y),
+    )
+    payload.update({key: value for key, value in options if value is not None})
 
     if actions:
         payload["actions"] = [x for x in actions if x]
@@ -1,16 +1,27 @@
 from __future__ import annotations
 
+import io
+import logging
 import os
-import sys
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Protocol
+from typing import Any, BinaryIO, Iterable, Protocol
 
 import boto3
 from botocore.client import Config as BotoConfig
+from botocore.exceptions import ClientError
 
 from app.core.config import settings
 
+logger = logging.getLogger("nacionalsign.storage")
+
 
 def _determine_base_storage() -> Path:
     raw = (
@@ -27,20 +38,38 @@ def _determine_base_storage() -> Path:
 
 BASE_STORAGE = _determine_base_storage()
 
+# Objetos a partir deste tamanho sobem em multipart, com as partes enviadas em paralelo.
+S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+S3_PART_SIZE = 8 * 1024 * 1024
+S3_TRANSFER_WORKERS = 8
+# Lotes de arquivos locais: leituras/escritas bloqueantes em paralelo (liberam o GIL).
+LOCAL_BATCH_WORKERS = 8
+# URLs pré-assinadas reaproveitadas até PRESIGNED_URL_MARGIN segundos antes de expirarem.
+PRESIGNED_URL_CACHE_SIZE = 4096
+PRESIGNED_URL_MARGIN = 60
+
+# Chave: (endpoint, access key, região, bucket, key, expiração) — URLs de outra configuração nunca são reaproveitadas.
+_presigned_url_cache: OrderedDict[tuple[Any, ...], tuple[str, float]] = OrderedDict()
+_presigned_url_lock = threading.Lock()
+
+
+_base_storage_override: Path | None = None
+
+
+def set_base_storage_override(path: str | Path | None) -> None:
+    """Registra a raiz usada por ``normalize_storage_path`` (o módulo de documentos chama ao carregar)."""
+    global _base_storage_override
+    _base_storage_override = Path(path) if path else None
+
+
+def get_base_storage_override() -> Path | None:
+    return _base_storage_override
+
 
 def _effective_base_storage() -> Path:
-    env_override = os.getenv("NACIONALSIGN_STORAGE")
-    if env_override:
+    if os.getenv("NACIONALSIGN_STORAGE"):
         return BASE_STORAGE
-
-    document_module = sys.modules.get("app.services.document")
-    override = getattr(document_module, "BASE_STORAGE", None) if document_module else None
-    if override:
-        try:
-            return Path(override)
-        except Exception:
-            return Path(str(override))
-    return _effective_base_storage()
+    return _base_storage_override or BASE_STORAGE
 
 
 def resolve_storage_root() -> Path:
@@ -62,6 +91,24 @@ def normalize_storage_path(value: str | Path) -> str:
         return str(path)
 
 
+def _fast_copy(src: Path, dst: Path) -> None:
+    """Copia ``src`` para ``dst`` no kernel (``copy_file_range``), com fallback para cópia em blocos de 1 MiB."""
+    with open(src, "rb") as source, open(dst, "wb") as target:
+        try:
+            remaining = os.fstat(source.fileno()).st_size
+            while remaining:
+                copied = os.copy_file_range(source.fileno(), target.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+        except (AttributeError, OSError):
+            # Sem copy_file_range (não-Linux / FS diferente): recomeça em espaço de usuário.
+            source.seek(0)
+            target.seek(0)
+            target.truncate()
+            shutil.copyfileobj(source, target, length=1 << 20)
+
+
 class StorageBackend(Protocol):
     def save_bytes(self, *, root: str, name: str, data: bytes) -> str:  # returns storage path/URL
         ...
@@ -72,6 +119,9 @@ class StorageBackend(Protocol):
     def load_bytes(self, path: str) -> bytes:
         ...
 
+    def delete(self, path: str) -> None:
+        ...
+
 
 @dataclass
 class LocalStorage:
@@ -84,11 +134,76 @@ class LocalStorage:
             self.base_dir = Path(self.base_dir)
         self.base_dir.mkdir(parents=True, exist_ok=True)
 
-    def save_bytes(self, *, root: str, name: str, data: bytes) -> str:
+    def save_bytes(self, *, root: str, name: str, data: bytes | memoryview) -> str:
+        target_dir = self.base_dir / root
+        target_dir.mkdir(parents=True, exist_ok=True)
+        file_path = target_dir / name
+        # Unbuffered write straight from a memoryview: no BufferedWriter copy of large blobs.
+        view = memoryview(data)
+        with open(file_path, "wb", buffering=0) as handle:
+            while view:
+                written = handle.write(view)
+                view = view[written:]
+        return str(file_path)
+
+    def save_bytes_many(self, items: Iterable[tuple[str, str, bytes]]) -> list[str]:
+        """Grava vários ``(root, name, data)`` com as escritas em voo ao mesmo tempo; devolve os caminhos na ordem."""
+        batch = list(items)
+        if len(batch) <= 1:
+            return [self.save_bytes(root=root, name=name, data=data) for root, name, data in batch]
+        with ThreadPoolExecutor(max_workers=min(LOCAL_BATCH_WORKERS, len(batch))) as pool:
+            return list(pool.map(lambda item: self.save_bytes(root=item[0], name=item[1], data=item[2]), batch))
+
+    def load_bytes_many(self, paths: Iterable[str]) -> list[bytes]:
+        batch = list(paths)
+        if len(batch) <= 1:
+            return [self.load_bytes(path) for path in batch]
+        with ThreadPoolExecutor(max_workers=min(LOCAL_BATCH_WORKERS, len(batch))) as pool:
+            return list(pool.map(self.load_bytes, batch))
+
+    def save_chunks(self, *, root: str, name: str, chunks: Iterable[bytes]) -> str:
+        """Grava os blocos à medida que são produzidos, sem juntar o conteúdo inteiro em memória."""
+        target_dir = self.base_dir / root
+        target_dir.mkdir(parents=True, exist_ok=True)
+        file_path = target_dir / name
+        try:
+            with open(file_path, "wb") as handle:
+                for chunk in chunks:
+                    handle.write(chunk)
+        except BaseException:
+            # O produtor pode falhar no meio (ex.: base64 inválido): não deixa arquivo parcial.
+            file_path.unlink(missing_ok=True)
+            raise
+        return str(file_path)
+
+    def save_stream(self, *, root: str, name: str, source: BinaryIO, length: int) -> str:
+        """Grava ``length`` bytes de um arquivo aberto sem materializá-los como ``bytes``."""
         target_dir = self.base_dir / root
         target_dir.mkdir(parents=True, exist_ok=True)
         file_path = target_dir / name
-        file_path.write_bytes(data)
+        with open(file_path, "wb") as handle:
+            try:
+                src_fd = source.fileno()
+            except (AttributeError, OSError, io.UnsupportedOperation):
+                src_fd = None
+            if src_fd is not None and hasattr(os, "sendfile"):
+                # Cópia no kernel (page cache -> page cache), sem buffer em espaço de usuário.
+                offset = source.tell()
+                sent = 0
+                while sent < length:
+                    count = os.sendfile(handle.fileno(), src_fd, offset + sent, length - sent)
+                    if count == 0:
+                        break
+                    sent += count
+                source.seek(offset + sent)
+            else:
+                remaining = length
+                while remaining:
+                    chunk = source.read(min(remaining, 1 << 20))
+                    if not chunk:
+                        break
+                    handle.write(chunk)
+                    remaining -= len(chunk)
         return str(file_path)
 
     def presigned_url(self, *, path: str, expires_seconds: int = 3600) -> str | None:  # noqa: ARG002
@@ -99,55 +214,212 @@ class LocalStorage:
         file_path = Path(path)
 
         candidates: list[Path] = []
+        legacy_candidate: Path | None = None
         if file_path.is_absolute():
             candidates.append(file_path)
         else:
             candidates.append(self.base_dir / path)
             legacy_root = self.base_dir.parent / "storage"
             if legacy_root != self.base_dir:
-                candidates.append(legacy_root / path)
+                legacy_candidate = legacy_root / path
+                candidates.append(legacy_candidate)
             candidates.append(Path.cwd() / path)
 
+        # Abre direto cada candidato: um open() por tentativa, sem resolve()/exists() antes.
         for candidate in candidates:
             try:
-                resolved = candidate.resolve()
-            except OSError:
-                resolved = candidate
-            if resolved.exists():
-                return resolved.read_bytes()
+                with open(candidate, "rb") as handle:
+                    data = handle.read()
+            except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+                continue
+            if candidate is legacy_candidate:
+                self._migrate_legacy_file(candidate, self.base_dir / path)
+            return data
 
         raise FileNotFoundError(f"Arquivo {path!r} nao foi encontrado no armazenamento configurado.")
 
+    def delete(self, path: str) -> None:
+        file_path = Path(path)
+        if not file_path.is_absolute():
+            file_path = self.base_dir / path
+        file_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _migrate_legacy_file(source: Path, target: Path) -> None:
+        """Copia um arquivo da raiz legada para ``base_dir``; as próximas leituras já o acham no primeiro candidato."""
+        partial: Path | None = None
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # Temporário único por leitor/processo: migrações concorrentes nunca escrevem no mesmo parcial.
+            fd, partial_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".migrating")
+            os.close(fd)
+            partial = Path(partial_name)
+            _fast_copy(source, partial)
+            shutil.copymode(source, partial)
+            os.replace(partial, target)
+            partial = None
+        except Exception:
+            # Migração é oportunista: a leitura já feita na raiz legada é devolvida mesmo assim.
+            logger.warning("Falha ao migrar %s para %s", source, target, exc_info=True)
+        finally:
+            if partial is not None:
+                partial.unlink(missing_ok=True)
+
 
 @dataclass
 class S3Storage:
     bucket: str
     client: any
+    # Identifica a configuração (endpoint, access key, região) nas chaves do cache de URLs pré-assinadas.
+    cache_scope: tuple[str, ...] = ()
 
     def save_bytes(self, *, root: str, name: str, data: bytes) -> str:
         key = f"{root.strip('/')}/{name}"
-        self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+        if len(data) < S3_MULTIPART_THRESHOLD:
+            self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+        else:
+            self._multipart_upload(key, data)
         return f"s3://{self.bucket}/{key}"
 
+    def save_chunks(self, *, root: str, name: str, chunks: Iterable[bytes]) -> str:
+        return self.save_bytes(root=root, name=name, data=b"".join(chunks))
+
+    def _multipart_upload(self, key: str, data: bytes) -> None:
+        upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=key)["UploadId"]
+        view = memoryview(data)
+
+        def upload_part(part_number: int, offset: int) -> dict[str, Any]:
+            response = self.client.upload_part(
+                Bucket=self.bucket,
+                Key=key,
+                PartNumber=part_number,
+                UploadId=upload_id,
+                Body=bytes(view[offset : offset + S3_PART_SIZE]),
+            )
+            return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+        offsets = range(0, len(data), S3_PART_SIZE)
+        try:
+            with ThreadPoolExecutor(max_workers=min(S3_TRANSFER_WORKERS, len(offsets))) as pool:
+                futures = [pool.submit(upload_part, number, offset) for number, offset in enumerate(offsets, 1)]
+                parts = [future.result() for future in futures]
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except Exception:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+
     def presigned_url(self, *, path: str, expires_seconds: int = 3600) -> str | None:
         if not path.startswith("s3://"):
             return None
         _, rest = path.split("s3://", 1)
         bucket, key = rest.split("/", 1)
-        return self.client.generate_presigned_url(
+        cache_key = (*self.cache_scope, bucket, key, expires_seconds)
+        now = time.monotonic()
+        with _presigned_url_lock:
+            hit = _presigned_url_cache.get(cache_key)
+            if hit is not None and hit[1] > now:
+                _presigned_url_cache.move_to_end(cache_key)
+                return hit[0]
+        url = self.client.generate_presigned_url(
             "get_object",
             Params={"Bucket": bucket, "Key": key},
             ExpiresIn=expires_seconds,
         )
+        valid_until = now + expires_seconds - PRESIGNED_URL_MARGIN
+        if valid_until > now:
+            with _presigned_url_lock:
+                _presigned_url_cache[cache_key] = (url, valid_until)
+                _presigned_url_cache.move_to_end(cache_key)
+                while len(_presigned_url_cache) > PRESIGNED_URL_CACHE_SIZE:
+                    _presigned_url_cache.popitem(last=False)
+        return url
+
+    def delete(self, path: str) -> None:
+        if not path.startswith("s3://"):
+            raise ValueError("Expected s3:// path for S3 storage")
+        _, rest = path.split("s3://", 1)
+        bucket, key = rest.split("/", 1)
+        self.client.delete_object(Bucket=bucket, Key=key)
+
+    def load_to_file(self, path: str, target: BinaryIO) -> None:
+        """Stream the object straight into ``target`` (e.g. a file headed for LocalStorage.save_stream)."""
+        if not path.startswith("s3://"):
+            raise ValueError("Expected s3:// path for S3 storage")
+        _, rest = path.split("s3://", 1)
+        bucket, key = rest.split("/", 1)
+        self.client.download_fileobj(bucket, key, target)
 
     def load_bytes(self, path: str) -> bytes:
         if not path.startswith("s3://"):
             raise ValueError("Expected s3:// path for S3 storage")
         _, rest = path.split("s3://", 1)
         bucket, key = rest.split("/", 1)
-        response = self.client.get_object(Bucket=bucket, Key=key)
+        # A primeira faixa também informa o tamanho total (ContentRange), sem head_object extra.
+        try:
+            response = self.client.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{S3_PART_SIZE - 1}")
+        except ClientError as exc:
+            # Objeto vazio: qualquer Range é inválido (416).
+            if exc.response.get("Error", {}).get("Code") != "InvalidRange":
+                raise
+            return b""
         body = response.get("Body")
-        return body.read() if body else b""
+        head = body.read() if body else b""
+        content_range = response.get("ContentRange") or ""
+        total = int(content_range.rsplit("/", 1)[1]) if "/" in content_range else len(head)
+        if total <= len(head):
+            return head
+
+        buffer = bytearray(total)
+        buffer[: len(head)] = head
+        # As demais faixas ficam presas à versão da primeira resposta: se o objeto for
+        # sobrescrito no meio do download, o S3 responde 412 em vez de misturar versões.
+        pinned: dict[str, str] = {"IfMatch": response["ETag"]} if response.get("ETag") else {}
+
+        def fetch_range(start: int) -> None:
+            end = min(start + S3_PART_SIZE, total) - 1
+            part = self.client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end}", **pinned)
+            data = part["Body"].read()
+            if len(data) != end - start + 1:
+                raise OSError(f"Leitura incompleta de {path!r}: faixa {start}-{end} retornou {len(data)} bytes.")
+            # Faixas disjuntas de tamanho exato: cada thread escreve só na sua fatia do buffer.
+            buffer[start : end + 1] = data
+
+        starts = range(len(head), total, S3_PART_SIZE)
+        with ThreadPoolExecutor(max_workers=min(S3_TRANSFER_WORKERS, len(starts))) as pool:
+            for _ in pool.map(fetch_range, starts):
+                pass
+        return bytes(buffer)
+
+
+@lru_cache(maxsize=4)
+def _s3_client(endpoint_url: str, access_key: str, secret_key: str, region: str) -> Any:
+    # boto3 clients are thread-safe; one per configuration keeps the session and connection pool warm.
+    return boto3.client(
+        "s3",
+        endpoint_url=endpoint_url,
+        aws_access_key_id=access_key,
+        aws_secret_access_key=secret_key,
+        config=BotoConfig(
+            signature_version="s3v4",
+            max_pool_connections=50,
+            retries={"max_attempts": 5, "mode": "standard"},
+        ),
+        region_name=region,
+    )
+
+
+@lru_cache(maxsize=4)
+def _s3_storage(bucket: str, endpoint_url: str, access_key: str, secret_key: str, region: str) -> S3Storage:
+    return S3Storage(
+        bucket=bucket,
+        client=_s3_client(endpoint_url, access_key, secret_key, region),
+        cache_scope=(endpoint_url, access_key, region),
+    )
 
 
 def get_storage() -> StorageBackend:
@@ -169,15 +441,13 @@ def get_storage() -> StorageBackend:
 
     # Prefer S3 when endpoint and credentials are available
     if settings.s3_endpoint_url and settings.s3_access_key and settings.s3_secret_key and settings.s3_bucket_documents:
-        client = boto3.client(
-            "s3",
-            endpoint_url=settings.s3_endpoint_url,
-            aws_access_key_id=settings.s3_access_key,
-            aws_secret_access_key=settings.s3_secret_key,
-            config=BotoConfig(signature_version="s3v4"),
-            region_name=os.getenv("AWS_REGION", "us-east-1"),
+        return _s3_storage(
+            settings.s3_bucket_documents,
+            settings.s3_endpoint_url,
+            settings.s3_access_key,
+            settings.s3_secret_key,
+            os.getenv("AWS_REGION", "us-east-1"),
         )
-        return S3Storage(bucket=settings.s3_bucket_documents, client=client)
 
     # Fallback to local storage under BASE_STORAGE
     return LocalStorage(base_dir=_effective_base_storage())
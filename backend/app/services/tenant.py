@@ -3,10 +3,12 @@ from __future__ import annotations
 from typing import Iterable
 from uuid import UUID
 
+from sqlalchemy import lambda_stmt
 from sqlmodel import Session, select
 
 from app.models.tenant import Area, Tenant
 from app.schemas.tenant import AreaCreate, AreaUpdate, TenantCreate
+from app.utils.ids import as_uuid
 
 
 class TenantService:
@@ -24,21 +26,22 @@ class TenantService:
         return self.session.get(Tenant, tenant_id)
 
     def list_areas(self, tenant_id: str | UUID, include_inactive: bool = False) -> Iterable[Area]:
-        tenant_uuid = UUID(str(tenant_id))
-        statement = select(Area).where(Area.tenant_id == tenant_uuid)
+        tenant_uuid = as_uuid(tenant_id)
+        # lambda_stmt: o SQL compilado fica no cache por código da lambda; só os parâmetros mudam.
+        statement = lambda_stmt(lambda: select(Area).where(Area.tenant_id == tenant_uuid))
         if not include_inactive:
-            statement = statement.where(Area.is_active.is_(True))
-        return self.session.exec(statement).all()
+            statement += lambda s: s.where(Area.is_active.is_(True))
+        return self.session.exec(statement).scalars().all()
 
     def get_area(self, tenant_id: str | UUID, area_id: str | UUID) -> Area | None:
-        tenant_uuid = UUID(str(tenant_id))
-        area = self.session.get(Area, UUID(str(area_id)))
+        tenant_uuid = as_uuid(tenant_id)
+        area = self.session.get(Area, as_uuid(area_id))
         if area and area.tenant_id == tenant_uuid:
             return area
         return None
 
     def create_area(self, tenant_id: str | UUID, payload: AreaCreate) -> Area:
-        tenant_uuid = UUID(str(tenant_id))
+        tenant_uuid = as_uuid(tenant_id)
         area = Area(tenant_id=tenant_uuid, **payload.model_dump())
         self.session.add(area)
         self.session.commit()
@@ -46,9 +49,8 @@ class TenantService:
         return area
 
     def update_area(self, area: Area, payload: AreaUpdate) -> Area:
-        update_data = payload.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(area, field, value)
+        for field in payload.__pydantic_fields_set__:
+            setattr(area, field, getattr(payload, field))
         self.session.add(area)
         self.session.commit()
         self.session.refresh(area)
@@ -1,84 +1,128 @@
 from __future__ import annotations
 
-from typing import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterable
 from uuid import UUID
 
+from sqlalchemy import lambda_stmt
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
 
 from app.models.tenant import Area
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserUpdate
 from app.utils.email_validation import normalize_deliverable_email
+from app.utils.ids import as_uuid
 from app.utils.security import get_password_hash, generate_secure_password
 
 
+# O hash de senha (pbkdf2_sha256) é CPU puro e o hashlib libera o GIL. Só create_user o dispara cedo,
+# para sobrepor às consultas de validação; por isso o pool é pequeno e fixo.
+PASSWORD_HASH_WORKERS = 2
+_HASH_POOL = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+
+def _start_password_hash(password: str) -> Future[str]:
+    return _HASH_POOL.submit(get_password_hash, password)
+
+
+DUPLICATE_EMAIL_MESSAGE = "Já existe um usuário com este e-mail."
+DUPLICATE_CPF_MESSAGE = "Já existe um usuário com este CPF."
+
+
+def _duplicate_user_error(exc: IntegrityError) -> ValueError | None:
+    # PostgreSQL reporta o nome da constraint; SQLite, as colunas ("users.tenant_id, users.email").
+    message = str(exc.orig)
+    if "uq_users_tenant_email" in message or "users.email" in message:
+        return ValueError(DUPLICATE_EMAIL_MESSAGE)
+    if "uq_users_tenant_cpf" in message or "users.cpf" in message:
+        return ValueError(DUPLICATE_CPF_MESSAGE)
+    return None
+
+
+# Conversões dos campos de UserUpdate para as colunas de User (aplicadas a valores não nulos).
+_USER_FIELD_TRANSFORMS: dict[str, Callable[[Any], Any]] = {
+    "profile": lambda role: role.value,
+    "phone_number": str.strip,
+}
+
+
 class UserService:
     def __init__(self, session: Session) -> None:
         self.session = session
+        # Áreas já validadas nesta instância (uma por requisição): (tenant, área) -> área.
+        self._area_cache: dict[tuple[UUID, UUID], UUID] = {}
 
     def list_users(self, tenant_id: str | UUID) -> Iterable[User]:
-        tenant_uuid = UUID(str(tenant_id))
-        statement = select(User).where(User.tenant_id == tenant_uuid)
-        return self.session.exec(statement).all()
+        tenant_uuid = as_uuid(tenant_id)
+        statement = lambda_stmt(lambda: select(User).where(User.tenant_id == tenant_uuid))
+        return self.session.exec(statement).scalars().all()
 
     def get_user(self, user_id: str | UUID) -> User | None:
-        return self.session.get(User, UUID(str(user_id)))
+        return self.session.get(User, as_uuid(user_id))
 
     def create_user(self, tenant_id: str | UUID, payload: UserCreate) -> User:
-        tenant_uuid = UUID(str(tenant_id))
-        area_id = self._validate_area(payload.default_area_id, tenant_uuid)
-
+        tenant_uuid = as_uuid(tenant_id)
+        password_hash = _start_password_hash(payload.password)
         try:
-            normalized_email = normalize_deliverable_email(payload.email)
-        except ValueError as exc:
-            raise ValueError("E-mail inválido") from exc
+            area_id = self._validate_area(payload.default_area_id, tenant_uuid)
+            try:
+                normalized_email = normalize_deliverable_email(payload.email)
+            except ValueError as exc:
+                raise ValueError("E-mail inválido") from exc
+        except ValueError:
+            # Validação falhou: o hash pbkdf2 ainda na fila não precisa rodar.
+            password_hash.cancel()
+            raise
         normalized_cpf = payload.cpf.strip() if payload.cpf else ""
         if not normalized_cpf:
             normalized_cpf = None
 
-        existing_email = self.session.exec(
-            select(User).where(User.email == normalized_email).where(User.tenant_id == tenant_uuid)
-        ).first()
-        if existing_email:
-            raise ValueError("Já existe um usuário com este e-mail.")
-
-        if normalized_cpf:
-            existing_cpf = self.session.exec(
-                select(User).where(User.cpf == normalized_cpf).where(User.tenant_id == tenant_uuid)
-            ).first()
-            if existing_cpf:
-                raise ValueError("Já existe um usuário com este CPF.")
-
         user = User(
             tenant_id=tenant_uuid,
             email=normalized_email,
             cpf=normalized_cpf,
             full_name=payload.full_name,
             phone_number=payload.phone_number.strip() if payload.phone_number else None,
-            password_hash=get_password_hash(payload.password),
+            password_hash=password_hash.result(),
             profile=payload.profile.value,
             default_area_id=area_id,
         )
         self.session.add(user)
-        self.session.commit()
+        # Unicidade de e-mail/CPF por tenant garantida pelas UNIQUE uq_users_tenant_email/uq_users_tenant_cpf.
+        try:
+            self.session.commit()
+        except IntegrityError as exc:
+            self.session.rollback()
+            duplicate = _duplicate_user_error(exc)
+            if duplicate is None:
+                raise
+            raise duplicate from exc
         self.session.refresh(user)
         return user
 
     def update_user(self, tenant_id: str | UUID, user: User, payload: UserUpdate) -> User:
-        tenant_uuid = UUID(str(tenant_id))
+        tenant_uuid = as_uuid(tenant_id)
         if user.tenant_id != tenant_uuid:
             raise ValueError("User does not belong to tenant")
 
-        update_data = payload.model_dump(exclude_unset=True)
-        if "password" in update_data:
-            update_data["password_hash"] = get_password_hash(update_data.pop("password"))
+        # Só os campos enviados no PATCH, sem montar o dicionário completo do model_dump().
+        password_hash: str | None = None
+        update_data: dict[str, object] = {}
+        for field in payload.__pydantic_fields_set__:
+            value = getattr(payload, field)
+            if field == "password":
+                password_hash = get_password_hash(value)
+                continue
+            if value is not None:
+                if field == "default_area_id":
+                    value = self._validate_area(value, tenant_uuid)
+                elif field in _USER_FIELD_TRANSFORMS:
+                    value = _USER_FIELD_TRANSFORMS[field](value)
+            update_data[field] = value
+        if password_hash is not None:
+            update_data["password_hash"] = password_hash
             update_data["must_change_password"] = False
-        if "profile" in update_data and update_data["profile"] is not None:
-            update_data["profile"] = update_data["profile"].value
-        if "default_area_id" in update_data and update_data["default_area_id"] is not None:
-            update_data["default_area_id"] = self._validate_area(update_data["default_area_id"], tenant_uuid)
-        if "phone_number" in update_data and update_data["phone_number"] is not None:
-            update_data["phone_number"] = update_data["phone_number"].strip()
 
         for field, value in update_data.items():
             setattr(user, field, value)
@@ -97,17 +141,18 @@ class UserService:
         payload_default_area: UUID | None = None,
     ) -> User:
         update_map: dict[str, object] = {}
+        password_hash = get_password_hash(payload_password) if payload_password else None
         if payload_full_name is not None:
             update_map["full_name"] = payload_full_name
         if payload_phone_number is not None:
             update_map["phone_number"] = payload_phone_number.strip() if payload_phone_number else None
-        if payload_password:
-            update_map["password_hash"] = get_password_hash(payload_password)
-            update_map["must_change_password"] = False
         if payload_two_factor is not None:
             update_map["two_factor_enabled"] = payload_two_factor
         if payload_default_area is not None:
             update_map["default_area_id"] = self._validate_area(payload_default_area, user.tenant_id)
+        if password_hash is not None:
+            update_map["password_hash"] = password_hash
+            update_map["must_change_password"] = False
 
         for field, value in update_map.items():
             setattr(user, field, value)
@@ -130,9 +175,10 @@ class UserService:
         actor_tenant_id: str | UUID,
         password_length: int = 14,
     ) -> str:
-        tenant_uuid = UUID(str(actor_tenant_id))
+        tenant_uuid = as_uuid(actor_tenant_id)
         if user.tenant_id != tenant_uuid:
             raise ValueError("User does not belong to tenant")
+        # Senha e hash prontos antes de tocar em ``user``: a transação só vê o UPDATE final.
         temporary_password = generate_secure_password(password_length)
         user.password_hash = get_password_hash(temporary_password)
         user.must_change_password = True
@@ -144,7 +190,12 @@ class UserService:
     def _validate_area(self, area_id: str | UUID | None, tenant_uuid: UUID) -> UUID | None:
         if area_id is None:
             return None
-        area = self.session.get(Area, UUID(str(area_id)))
+        key = (tenant_uuid, as_uuid(area_id))
+        cached = self._area_cache.get(key)
+        if cached is not None:
+            return cached
+        area = self.session.get(Area, key[1])
         if not area or area.tenant_id != tenant_uuid:
             raise ValueError("Area does not belong to tenant")
+        self._area_cache[key] = area.id
         return area.id
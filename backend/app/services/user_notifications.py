@@ -1,13 +1,19 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timezone
 from uuid import UUID
 
+from sqlalchemy import case, lambda_stmt, update
 from sqlmodel import Session, func, select
 
 from app.models.notification import UserNotification
 
 
+def _utcnow() -> datetime:
+    # UTC "naive", como as demais colunas de data; sem o datetime.utcnow() depreciado no 3.12.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class UserNotificationService:
     def __init__(self, session: Session) -> None:
         self.session = session
@@ -20,17 +26,24 @@ class UserNotificationService:
         offset: int = 0,
         only_unread: bool = False,
     ) -> tuple[list[UserNotification], int]:
-        query = (
-            select(UserNotification)
+        # Cada linha da página traz o total de não lidas do destinatário (janela sobre o WHERE),
+        # evitando um segundo SELECT COUNT(*) quando a página tem itens.
+        query = lambda_stmt(
+            lambda: select(
+                UserNotification,
+                func.sum(case((UserNotification.read_at.is_(None), 1), else_=0)).over(),
+            )
             .where(UserNotification.recipient_id == recipient_id)
             .order_by(UserNotification.created_at.desc())
             .offset(offset)
             .limit(limit)
         )
         if only_unread:
-            query = query.where(UserNotification.read_at.is_(None))
+            query += lambda s: s.where(UserNotification.read_at.is_(None))
 
-        items = list(self.session.exec(query).all())
+        rows = self.session.exec(query).all()
+        if rows:
+            return [item for item, _ in rows], int(rows[0][1] or 0)
 
         unread_query = (
             select(func.count())
@@ -39,30 +52,26 @@ class UserNotificationService:
         )
         unread_count = self.session.exec(unread_query).one()
 
-        return items, int(unread_count or 0)
+        return [], int(unread_count or 0)
 
     def mark_as_read(self, *, recipient_id: UUID, notification_id: UUID) -> UserNotification:
         notification = self.session.get(UserNotification, notification_id)
         if not notification or notification.recipient_id != recipient_id:
             raise ValueError("Notification not found")
         if not notification.read_at:
-            notification.read_at = datetime.utcnow()
+            notification.read_at = _utcnow()
             self.session.add(notification)
             self.session.commit()
             self.session.refresh(notification)
         return notification
 
     def mark_all_as_read(self, *, recipient_id: UUID) -> int:
-        updated = (
-            self.session.exec(
-                select(UserNotification).where(UserNotification.recipient_id == recipient_id).where(UserNotification.read_at.is_(None))
-            ).all()
+        # Um único UPDATE no banco; nada de carregar e marcar linha a linha no ORM.
+        result = self.session.exec(
+            update(UserNotification)
+            .where(UserNotification.recipient_id == recipient_id)
+            .where(UserNotification.read_at.is_(None))
+            .values(read_at=_utcnow())
         )
-        if not updated:
-            return 0
-        now = datetime.utcnow()
-        for item in updated:
-            item.read_at = now
-            self.session.add(item)
         self.session.commit()
-        return len(updated)
+        return int(result.rowcount or 0)
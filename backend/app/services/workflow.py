@@ -3,12 +3,18 @@ import base64
 import binascii
 import hashlib
 import json
+import logging
 import re
 import secrets
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Iterable, Any, Dict, Tuple
-from uuid import UUID
+from typing import Iterator, Any, Dict, Tuple
+from uuid import UUID, uuid4
 from fastapi import HTTPException
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import joinedload, selectinload
 from sqlmodel import Session, select
 from app.core.config import settings
 from app.models.document import AuditArtifact, Document, DocumentGroup, DocumentParty, DocumentField, DocumentStatus
@@ -41,6 +47,45 @@ from app.services.audit import AuditService
 from app.services.icp import SignatureResult
 from app.services.storage import get_storage, normalize_storage_path
 
+try:  # pragma: no cover - optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - stdlib json is the fallback
+    orjson = None  # type: ignore[assignment]
+
+try:  # pragma: no cover - optional dependency
+    import pybase64
+except ImportError:  # pragma: no cover - stdlib base64 is the fallback
+    pybase64 = None  # type: ignore[assignment]
+
+
+logger = logging.getLogger("nacionalsign.workflow")
+
+
+# O SHA-256 do hashlib (OpenSSL) libera o GIL: o digest dos artefatos corre enquanto o storage grava.
+_DIGEST_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="artifact-digest")
+
+
+def _start_sha256(data: bytes) -> Future[str]:
+    return _DIGEST_POOL.submit(lambda: hashlib.sha256(data).hexdigest())
+
+
+# Upload da imagem de assinatura em paralelo com o PDF assinado; o resultado é aguardado antes do commit.
+_UPLOAD_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="signature-upload")
+
+
+def _b64decode(encoded: str) -> bytes:
+    """Decodifica base64 estrito; usa o decodificador SIMD do pybase64 quando instalado."""
+    if pybase64 is not None:
+        return pybase64.b64decode(encoded, validate=True)
+    return base64.b64decode(encoded, validate=True)
+
+
+def _b64decode_chunks(encoded: str, chunk_chars: int = 1 << 16) -> Iterator[bytes]:
+    """Decodifica em fatias de ``chunk_chars`` caracteres (múltiplo de 4), bloco a bloco."""
+    for start in range(0, len(encoded), chunk_chars):
+        yield _b64decode(encoded[start : start + chunk_chars])
+
+
 class WorkflowService:
     MAX_SIGNATURE_IMAGE_BYTES = 2 * 1024 * 1024  # 2 MB
     ALLOWED_SIGNATURE_IMAGE_MIMES: Dict[str, str] = {
@@ -49,12 +94,40 @@ class WorkflowService:
         "image/jpg": ".jpg",
     }
     DEFAULT_SIGNATURE_IMAGE_EXT = ".png"
-    _CERTIFICATE_CPF_PATTERNS = (
-        re.compile(r"CPF\s*[:=]?\s*([0-9]{3}\.?[0-9]{3}\.?[0-9]{3}-?[0-9]{2})", re.IGNORECASE),
-        re.compile(r"SERIALNUMBER\s*[:=]?\s*(?:CPF\s*)?([0-9]{3}\.?[0-9]{3}\.?[0-9]{3}-?[0-9]{2})", re.IGNORECASE),
-        re.compile(r"2\.16\.76\.1\.3\.1\s*[:=]?\s*([0-9]{11})", re.IGNORECASE),
+    # CPF / SERIALNUMBER / OID ICP-Brasil numa única alternância: uma passada sobre o texto.
+    _CERTIFICATE_CPF_PATTERN = re.compile(
+        r"(?:SERIALNUMBER\s*[:=]?\s*(?:CPF\s*)?|CPF\s*[:=]?\s*)([0-9]{3}\.?[0-9]{3}\.?[0-9]{3}-?[0-9]{2})"
+        r"|2\.16\.76\.1\.3\.1\s*[:=]?\s*([0-9]{11})",
+        re.IGNORECASE,
     )
-    _GENERIC_CPF_PATTERN = re.compile(r"([0-9]{3}\.?[0-9]{3}\.?[0-9]{3}-?[0-9]{2})")
+    _CERTIFICATE_CPF_KEYWORDS = re.compile(r"CPF|SERIALNUMBER|2\.16\.76\.1\.3\.1", re.IGNORECASE)
+    _DIGITAL_SIGNATURE_METHODS = frozenset(
+        {"digital", "certificado", "certificado digital", "certificado-icp", "icp", "icp-brasil"}
+    )
+    _DIGITAL_SIGNATURE_LABEL_PATTERN = re.compile(r"digital|icp", re.IGNORECASE)
+    # Marcadores de certificado no rótulo/autenticação enviados pelo cliente (uma busca em C por campo).
+    _CERTIFICATE_MARKER_PATTERN = re.compile(r"digital|certificado|icp")
+    _CERTIFICATE_MARKER_PATTERN_CI = re.compile(_CERTIFICATE_MARKER_PATTERN.pattern, re.IGNORECASE)
+    # Colunas copiadas ao replicar as partes do documento principal para os demais do grupo.
+    _PARTY_CLONE_COLUMNS = tuple(
+        column.name
+        for column in DocumentParty.__table__.columns
+        if column.name not in {"id", "created_at", "updated_at", "document_id"}
+    )
+    # Etapa e parte vêm no mesmo SELECT da solicitação (JOIN em relações muitos-para-um).
+    _SIGNING_LOAD_OPTIONS = (joinedload(SignatureRequest.step).joinedload(WorkflowStep.party),)
+    LIST_BATCH_SIZE = 200
+    # Passos já validados por conteúdo do config_json: editar o template muda a chave, sem invalidação manual.
+    TEMPLATE_STEPS_CACHE_SIZE = 256
+    _TEMPLATE_STEPS_CACHE: OrderedDict[str, tuple[WorkflowStepConfig, ...]] = OrderedDict()
+    _TEMPLATE_STEPS_LOCK = threading.Lock()
+    # Só as duas formas concretas (formatada ou 11 dígitos), sem separadores opcionais para retroceder.
+    _GENERIC_CPF_PATTERN = re.compile(r"([0-9]{3}\.[0-9]{3}\.[0-9]{3}-[0-9]{2}|[0-9]{11})")
+    # Os grupos capturados acima só têm dígitos ASCII, "." e "-": basta apagar os separadores (em C).
+    _CPF_SEPARATORS = str.maketrans("", "", ".-")
+    _NON_DIGITS = re.compile(r"\D+")
+    # Separadores de caminho viram "_" nos nomes de arquivo enviados pelo cliente.
+    _PATH_SEPARATORS = str.maketrans({"\\": "_", "/": "_"})
 
     def __init__(self, session: Session, notification_service: NotificationService | None = None) -> None:
         self.session = session
@@ -77,7 +150,9 @@ class WorkflowService:
     def _normalize_cpf_value(value: str | None) -> str | None:
         if not value:
             return None
-        digits = "".join(ch for ch in value if ch.isdigit())
+        if len(value) == 11 and value.isascii() and value.isdigit():
+            return value
+        digits = WorkflowService._NON_DIGITS.sub("", value)
         if len(digits) != 11:
             return None
         return digits
@@ -97,17 +172,15 @@ class WorkflowService:
         text = raw.strip()
         if not text:
             return None
-        for pattern in cls._CERTIFICATE_CPF_PATTERNS:
-            match = pattern.search(text)
-            if match:
-                digits = "".join(ch for ch in match.group(1) if ch.isdigit())
-                if len(digits) == 11:
-                    return digits
-        upper = text.upper()
-        if any(keyword in upper for keyword in ("CPF", "SERIALNUMBER", "2.16.76.1.3.1")):
+        match = cls._CERTIFICATE_CPF_PATTERN.search(text)
+        if match:
+            digits = (match.group(1) or match.group(2)).translate(cls._CPF_SEPARATORS)
+            if len(digits) == 11:
+                return digits
+        if cls._CERTIFICATE_CPF_KEYWORDS.search(text):
             generic = cls._GENERIC_CPF_PATTERN.search(text)
             if generic:
-                digits = "".join(ch for ch in generic.group(1) if ch.isdigit())
+                digits = generic.group(1).translate(cls._CPF_SEPARATORS)
                 if len(digits) == 11:
                     return digits
         return None
@@ -123,6 +196,8 @@ class WorkflowService:
                 raise ValueError("Template step orders must be unique")
             seen_orders.add(step.order)
             normalized.append(step.model_dump())
+        if orjson is not None:
+            return orjson.dumps(normalized).decode("utf-8")
         return json.dumps(normalized)
 
     def create_template(
@@ -152,13 +227,14 @@ class WorkflowService:
         tenant_id: UUID,
         area_id: UUID | None = None,
         include_inactive: bool = False,
-    ) -> list[WorkflowTemplate]:
+    ) -> Iterator[WorkflowTemplate]:
         statement = select(WorkflowTemplate).where(WorkflowTemplate.tenant_id == tenant_id)
         if area_id:
             statement = statement.where(WorkflowTemplate.area_id == area_id)
         if not include_inactive:
             statement = statement.where(WorkflowTemplate.is_active.is_(True))
-        return self.session.exec(statement).all()
+        # Em lotes: quem chama percorre uma vez só, sem materializar o resultado inteiro antes.
+        yield from self.session.exec(statement.execution_options(yield_per=self.LIST_BATCH_SIZE))
 
     def get_template(self, template_id: UUID) -> WorkflowTemplate | None:
         return self.session.get(WorkflowTemplate, template_id)
@@ -172,14 +248,21 @@ class WorkflowService:
         template = self.get_template(template_id)
         if not template or template.tenant_id != tenant_id:
             raise ValueError("Template not found for tenant")
+        changes: dict[str, object] = {}
         if payload.name is not None:
-            template.name = payload.name
+            changes["name"] = payload.name
         if payload.description is not None:
-            template.description = payload.description
+            changes["description"] = payload.description
         if payload.steps is not None:
-            template.config_json = self._prepare_template_config(payload.steps)
+            changes["config_json"] = self._prepare_template_config(payload.steps)
         if payload.is_active is not None:
-            template.is_active = payload.is_active
+            changes["is_active"] = payload.is_active
+        changes = {field: value for field, value in changes.items() if getattr(template, field) != value}
+        if not changes:
+            # PATCH idempotente: nada a gravar, sem UPDATE nem SELECT de refresh.
+            return template
+        for field, value in changes.items():
+            setattr(template, field, value)
         self.session.add(template)
         self.session.commit()
         self.session.refresh(template)
@@ -222,9 +305,9 @@ class WorkflowService:
     def get_workflow(self, workflow_id: str | UUID) -> WorkflowInstance | None:
         return self.session.get(WorkflowInstance, UUID(str(workflow_id)))
 
-    def list_workflows(self, document_id: str | UUID) -> Iterable[WorkflowInstance]:
+    def list_workflows(self, document_id: str | UUID) -> Iterator[WorkflowInstance]:
         statement = select(WorkflowInstance).where(WorkflowInstance.document_id == UUID(str(document_id)))
-        return self.session.exec(statement).all()
+        yield from self.session.exec(statement.execution_options(yield_per=self.LIST_BATCH_SIZE))
 
     def _get_document(self, tenant_id: UUID, document_id: UUID) -> Document:
         document = self.session.get(Document, document_id)
@@ -233,9 +316,25 @@ class WorkflowService:
         return document
 
     def _load_template_steps(self, template: WorkflowTemplate) -> list[WorkflowStepConfig]:
+        config_json = template.config_json
+        with self._TEMPLATE_STEPS_LOCK:
+            cached = self._TEMPLATE_STEPS_CACHE.get(config_json)
+            if cached is not None:
+                self._TEMPLATE_STEPS_CACHE.move_to_end(config_json)
+        if cached is None:
+            cached = self._parse_template_steps(config_json)
+            with self._TEMPLATE_STEPS_LOCK:
+                self._TEMPLATE_STEPS_CACHE[config_json] = cached
+                while len(self._TEMPLATE_STEPS_CACHE) > self.TEMPLATE_STEPS_CACHE_SIZE:
+                    self._TEMPLATE_STEPS_CACHE.popitem(last=False)
+        # Cópias rasas: quem chama pode alterar os passos sem contaminar o cache.
+        return [step.model_copy() for step in cached]
+
+    @staticmethod
+    def _parse_template_steps(config_json: str) -> tuple[WorkflowStepConfig, ...]:
         try:
-            raw_config = json.loads(template.config_json)
-        except json.JSONDecodeError as exc:
+            raw_config = orjson.loads(config_json) if orjson is not None else json.loads(config_json)
+        except json.JSONDecodeError as exc:  # orjson.JSONDecodeError herda desta
             raise ValueError("Invalid template configuration") from exc
         if not isinstance(raw_config, list):
             raise ValueError("Template configuration must be a list")
@@ -247,7 +346,7 @@ class WorkflowService:
                 steps.append(WorkflowStepConfig.model_validate(item))
             except ValidationError as exc:
                 raise ValueError("Invalid template step configuration") from exc
-        return sorted(steps, key=lambda cfg: cfg.order)
+        return tuple(sorted(steps, key=lambda cfg: cfg.order))
 
     def _match_template_parties(
         self,
@@ -258,7 +357,7 @@ class WorkflowService:
             raise ValueError("No parties configured for document")
         parties_by_role: dict[str, list[DocumentParty]] = {}
         for party in sorted(document_parties, key=lambda item: item.order_index):
-            role_key = (party.role or "").strip().lower()
+            role_key = self._normalize_role(party.role)
             parties_by_role.setdefault(role_key, []).append(party)
         usage: dict[str, int] = {}
         assignments: list[tuple[DocumentParty, WorkflowStepConfig]] = []
@@ -323,7 +422,7 @@ class WorkflowService:
                 party,
                 WorkflowStepConfig(
                     order=index,
-                    role=(party.role or "").strip().lower(),
+                    role=self._normalize_role(party.role),
                     action="sign",
                     execution="sequential",
                 ),
@@ -338,23 +437,25 @@ class WorkflowService:
             .order_by(Document.created_at.asc())
         ).all()
 
-    def _clone_parties_to_document(
+    def _clone_parties_to_documents(
         self,
         *,
         source_parties: list[DocumentParty],
-        target_document: Document,
+        target_documents: list[Document],
     ) -> None:
-        existing = self.session.exec(
-            select(DocumentParty).where(DocumentParty.document_id == target_document.id)
-        ).all()
-        for party in existing:
-            self.session.delete(party)
-        self.session.flush()
-        for source in source_parties:
-            data = source.model_dump(exclude={"id", "created_at", "updated_at", "document_id"})
-            data["document_id"] = target_document.id
-            clone = DocumentParty(**data)
-            self.session.add(clone)
+        if not target_documents:
+            return
+        # Um DELETE e um flush para o grupo inteiro, em vez de um ciclo por documento.
+        target_ids = [document.id for document in target_documents]
+        self.session.exec(delete(DocumentParty).where(DocumentParty.document_id.in_(target_ids)))
+        source_values = [
+            {column: getattr(source, column) for column in self._PARTY_CLONE_COLUMNS} for source in source_parties
+        ]
+        self.session.add_all(
+            DocumentParty(document_id=document_id, **values)
+            for document_id in target_ids
+            for values in source_values
+        )
         self.session.flush()
 
     def issue_signature_token(self, request_id: UUID) -> str:
@@ -362,7 +463,7 @@ class WorkflowService:
         if not request:
             raise ValueError("Request not found")
         token = secrets.token_urlsafe(32)
-        token_hash = hashlib.sha256(token.encode()).hexdigest()
+        token_hash = hashlib.sha256(token.encode("ascii")).hexdigest()
         request.token_hash = token_hash
         request.token_expires_at = None
         if not request.token_channel:
@@ -373,11 +474,14 @@ class WorkflowService:
 
     def _find_request_by_token(self, token: str) -> SignatureRequest:
         normalized_token = (token or "").strip()
-        if not normalized_token:
+        # Tokens emitidos são base64 url-safe (ASCII); qualquer outra coisa não pode bater.
+        if not normalized_token or not normalized_token.isascii():
             raise ValueError("Invalid token")
-        token_hash = hashlib.sha256(normalized_token.encode()).hexdigest()
+        token_hash = hashlib.sha256(normalized_token.encode("ascii")).hexdigest()
         request = self.session.exec(
-            select(SignatureRequest).where(SignatureRequest.token_hash == token_hash)
+            select(SignatureRequest)
+            .where(SignatureRequest.token_hash == token_hash)
+            .options(*self._SIGNING_LOAD_OPTIONS)
         ).first()
         if not request:
             raise ValueError("Invalid token")
@@ -395,12 +499,57 @@ class WorkflowService:
                 self.session.flush()
         return request
 
+    def _add_workflow_steps(
+        self,
+        workflow: WorkflowInstance,
+        assignments: list[tuple[DocumentParty, WorkflowStepConfig]],
+        normalized_channels: dict[UUID, str],
+        *,
+        document_ids: list[UUID],
+        group_id: UUID | None,
+        now: datetime,
+    ) -> None:
+        # IDs gerados no cliente (uuid4): nenhum flush entre etapas; um flush agrupa workflow/etapas por tabela.
+        steps: list[WorkflowStep] = []
+        request_rows: list[dict[str, Any]] = []
+        for index, (party, cfg) in enumerate(assignments, start=1):
+            deadline_at = now + timedelta(hours=cfg.deadline_hours) if cfg.deadline_hours else None
+            step = WorkflowStep(
+                workflow_id=workflow.id,
+                party_id=party.id,
+                step_index=index,
+                phase_index=getattr(cfg, "order", None) or index,
+                action=cfg.action,
+                execution_type=cfg.execution,
+                deadline_at=deadline_at,
+            )
+            steps.append(step)
+            channel = normalized_channels.get(party.id, "email")
+            # Solicitações (etapas x documentos) como linhas simples: sem instanciar/validar um modelo por linha.
+            request_rows.extend(
+                {
+                    "id": uuid4(),
+                    "created_at": now,
+                    "workflow_step_id": step.id,
+                    "document_id": document_id,
+                    "group_id": group_id,
+                    "token_channel": channel,
+                    "status": SignatureRequestStatus.PENDING,
+                }
+                for document_id in document_ids
+            )
+        self.session.add_all(steps)
+        # Workflow e etapas precisam existir antes (FK) do INSERT executemany das solicitações.
+        self.session.flush()
+        self.session.exec(insert(SignatureRequest), params=request_rows)
+
     def dispatch_workflow(
         self,
         tenant_id: str | UUID,
         document_id: str | UUID,
         payload: WorkflowDispatch,
     ) -> WorkflowInstance:
+        now = datetime.utcnow()
         tenant_uuid = UUID(str(tenant_id))
         document_uuid = UUID(str(document_id))
         document = self._get_document(tenant_uuid, document_uuid)
@@ -416,35 +565,17 @@ class WorkflowService:
             group_id=document.group_id,
             template_id=payload.template_id,
             status=WorkflowStatus.IN_PROGRESS,
-            started_at=datetime.utcnow(),
+            started_at=now,
         )
         self.session.add(workflow)
-        self.session.flush()
-        for index, (party, cfg) in enumerate(parties, start=1):
-            deadline_at = None
-            if cfg.deadline_hours:
-                deadline_at = datetime.utcnow() + timedelta(hours=cfg.deadline_hours)
-            phase_index = getattr(cfg, "order", None) or index
-            step = WorkflowStep(
-                workflow_id=workflow.id,
-                party_id=party.id,
-                step_index=index,
-                phase_index=phase_index,
-                action=cfg.action,
-                execution_type=cfg.execution,
-                deadline_at=deadline_at,
-            )
-            self.session.add(step)
-            self.session.flush()
-            channel = normalized_channels.get(party.id, "email")
-            request = SignatureRequest(
-                workflow_step_id=step.id,
-                document_id=document.id,
-                group_id=document.group_id,
-                token_channel=channel,
-                status=SignatureRequestStatus.PENDING,
-            )
-            self.session.add(request)
+        self._add_workflow_steps(
+            workflow,
+            parties,
+            normalized_channels,
+            document_ids=[document.id],
+            group_id=document.group_id,
+            now=now,
+        )
         document.status = DocumentStatus.IN_PROGRESS
         self._advance_workflow(workflow, document)
         self.session.add(document)
@@ -458,6 +589,7 @@ class WorkflowService:
         group_id: str | UUID,
         payload: WorkflowDispatch,
     ) -> tuple[DocumentGroup, list[WorkflowInstance]]:
+        now = datetime.utcnow()
         tenant_uuid = UUID(str(tenant_id))
         group = self.session.get(DocumentGroup, UUID(str(group_id)))
         if not group or group.tenant_id != tenant_uuid:
@@ -477,49 +609,33 @@ class WorkflowService:
         party_rows = self._load_document_parties(primary_document)
         normalized_channels = self._normalize_notification_channels(party_rows)
         parties = self._build_step_assignments(primary_document, party_rows, payload)
-        for document in documents:
-            if document.id == primary_document.id:
-                continue
-            self._clone_parties_to_document(source_parties=party_rows, target_document=document)
+        self._clone_parties_to_documents(
+            source_parties=party_rows,
+            target_documents=[document for document in documents if document.id != primary_document.id],
+        )
         workflow = WorkflowInstance(
             document_id=primary_document.id,
             group_id=group.id,
             template_id=payload.template_id,
             status=WorkflowStatus.IN_PROGRESS,
-            started_at=datetime.utcnow(),
+            started_at=now,
             is_group_workflow=True,
         )
         self.session.add(workflow)
-        self.session.flush()
-        for index, (party, cfg) in enumerate(parties, start=1):
-            deadline_at = None
-            if cfg.deadline_hours:
-                deadline_at = datetime.utcnow() + timedelta(hours=cfg.deadline_hours)
-            phase_index = getattr(cfg, "order", None) or index
-            step = WorkflowStep(
-                workflow_id=workflow.id,
-                party_id=party.id,
-                step_index=index,
-                phase_index=phase_index,
-                action=cfg.action,
-                execution_type=cfg.execution,
-                deadline_at=deadline_at,
-            )
-            self.session.add(step)
-            self.session.flush()
-            for document in documents:
-                channel = normalized_channels.get(party.id, "email")
-                request = SignatureRequest(
-                    workflow_step_id=step.id,
-                    document_id=document.id,
-                    group_id=group.id,
-                    token_channel=channel,
-                    status=SignatureRequestStatus.PENDING,
-                )
-                self.session.add(request)
-        for document in documents:
-            document.status = DocumentStatus.IN_PROGRESS
-            self.session.add(document)
+        self._add_workflow_steps(
+            workflow,
+            parties,
+            normalized_channels,
+            document_ids=[document.id for document in documents],
+            group_id=group.id,
+            now=now,
+        )
+        # Um UPDATE para o grupo todo; a sincronização da sessão ajusta os objetos já carregados.
+        self.session.exec(
+            update(Document)
+            .where(Document.id.in_([document.id for document in documents]))
+            .values(status=DocumentStatus.IN_PROGRESS, updated_at=now)
+        )
         self._advance_workflow(workflow, primary_document)
         self.session.commit()
         self.session.refresh(group)
@@ -541,7 +657,7 @@ class WorkflowService:
         step = self.session.get(WorkflowStep, request.workflow_step_id)
         if not step:
             raise ValueError("Workflow step missing")
-        party = step.party or self.session.get(DocumentParty, step.party_id)
+        party = step.party
         now = datetime.utcnow()
         signature_entry: Signature | None = None
         evidence_log: Dict[str, Any] | None = None
@@ -551,12 +667,16 @@ class WorkflowService:
             image_required = field_meta["signature_image_required"]
             available_fields = field_meta["field_types"]
             role_fields = self._load_role_fields(document, party)
-            field_lookup: Dict[str, DocumentField] = {str(field.id): field for field in role_fields}
-            required_field_ids = {
-                str(field.id)
-                for field in role_fields
-                if field.field_type in {"signature", "signature_image", "typed_name"} and field.required
-            }
+            # Uma passada: índice por id, baldes por tipo e campos de assinatura obrigatórios.
+            field_lookup: Dict[str, DocumentField] = {}
+            fields_by_type: Dict[str, list[DocumentField]] = {}
+            required_field_ids: set[str] = set()
+            for field in role_fields:
+                field_key = str(field.id)
+                field_lookup[field_key] = field
+                fields_by_type.setdefault(field.field_type, []).append(field)
+                if field.required and field.field_type in {"signature", "signature_image", "typed_name"}:
+                    required_field_ids.add(field_key)
             provided_field_ids: set[str] = set()
             field_value_capture: Dict[str, Dict[str, Any]] = {}
             if typed_required and party and not party.allow_typed_name:
@@ -564,20 +684,9 @@ class WorkflowService:
             if image_required and party and not party.allow_signature_image:
                 raise ValueError("Configuração do signatário não permite imagem obrigatória.")
             if request.token_hash and payload.token:
-                signature_type_label = (payload.signature_type or "").strip().lower()
                 method = (getattr(party, "signature_method", "") or "").strip().lower()
-                is_digital = (
-                    signature_type_label == "digital"
-                    or "digital" in signature_type_label
-                    or "icp" in signature_type_label
-                    or method in {
-                        "digital",
-                        "certificado",
-                        "certificado digital",
-                        "certificado-icp",
-                        "icp",
-                        "icp-brasil",
-                    }
+                is_digital = method in self._DIGITAL_SIGNATURE_METHODS or bool(
+                    payload.signature_type and self._DIGITAL_SIGNATURE_LABEL_PATTERN.search(payload.signature_type)
                 )
                 if is_digital:
                     pass
@@ -588,9 +697,9 @@ class WorkflowService:
                         if not provided_email or expected_email != provided_email:
                             raise ValueError("Confirme o e-mail cadastrado para continuar.")
                     if party and party.require_phone and getattr(party, "phone_number", None):
-                        digits = "".join(ch for ch in party.phone_number if ch.isdigit())
+                        digits = self._NON_DIGITS.sub("", party.phone_number)
                         expected_target = digits[-4:] if len(digits) > 4 else digits
-                        provided_last4 = "".join(ch for ch in (payload.confirm_phone_last4 or "") if ch.isdigit())
+                        provided_last4 = self._NON_DIGITS.sub("", payload.confirm_phone_last4 or "")
                         if expected_target:
                             if not provided_last4 or provided_last4 != expected_target:
                                 message = (
@@ -636,9 +745,9 @@ class WorkflowService:
                         provided_field_ids.add(field_id)
                         field_value_capture[field_id] = normalized
             if typed_name_value:
-                for field in role_fields:
+                for field in fields_by_type.get("typed_name", ()):
                     field_key = str(field.id)
-                    if field.field_type != "typed_name" or field_key in provided_field_ids:
+                    if field_key in provided_field_ids:
                         continue
                     normalized = document_service.apply_field_signature(
                         document=document,
@@ -656,9 +765,9 @@ class WorkflowService:
                     "signature_image_mime": payload.signature_image_mime,
                     "signature_image_name": payload.signature_image_name,
                 }
-                for field in role_fields:
+                for field in fields_by_type.get("signature_image", ()):
                     field_key = str(field.id)
-                    if field.field_type != "signature_image" or field_key in provided_field_ids:
+                    if field_key in provided_field_ids:
                         continue
                     normalized = document_service.apply_field_signature(
                         document=document,
@@ -669,60 +778,15 @@ class WorkflowService:
                         provided_field_ids.add(field_key)
                         field_value_capture[field_key] = normalized
                     break
-            if required_field_ids:
-                missing_required = [
-                    field_lookup[field_id].label or field_lookup[field_id].field_type
-                    for field_id in required_field_ids
-                    if field_id not in provided_field_ids
-                ]
-                if missing_required:
-                    targets = ", ".join(missing_required)
-                    raise ValueError(f"Preencha os campos obrigatórios: {targets}")
-            image_payload = payload.signature_image
-            image_meta: Dict[str, Any] | None = None
-            if image_payload:
-                if party and not party.allow_signature_image:
-                    raise ValueError("Upload de imagem não é permitido para este signatário.")
-                image_bytes, detected_mime = self._decode_signature_image(image_payload)
-                image_mime = (payload.signature_image_mime or detected_mime or "image/png").lower()
-                if image_mime not in self.ALLOWED_SIGNATURE_IMAGE_MIMES:
-                    raise ValueError("Formato de imagem não suportado. Utilize PNG ou JPEG.")
-                if not image_bytes:
-                    raise ValueError("Imagem de assinatura vazia.")
-                if len(image_bytes) > self.MAX_SIGNATURE_IMAGE_BYTES:
-                    raise ValueError("Imagem de assinatura excede o limite de 2 MB.")
-                if not consent_given:
-                    raise ValueError("É necessário autorizar o uso da imagem para concluir a assinatura.")
-                extension = self.ALLOWED_SIGNATURE_IMAGE_MIMES[image_mime]
-                filename = self._build_signature_filename(payload.signature_image_name, extension, request.id)
-                storage = get_storage()
-                storage_root = f"signatures/{document.tenant_id}/{document.id}"
-                storage_path = storage.save_bytes(
-                    root=storage_root,
-                    name=filename,
-                    data=image_bytes,
-                )
-                storage_path = normalize_storage_path(storage_path)
-                image_sha = hashlib.sha256(image_bytes).hexdigest()
-                artifact = AuditArtifact(
-                    document_id=document.id,
-                    artifact_type="signature_image",
-                    storage_path=storage_path,
-                    sha256=image_sha,
-                    issued_at=now,
+            missing_field_ids = required_field_ids - provided_field_ids
+            if missing_field_ids:
+                targets = ", ".join(
+                    field_lookup[field_id].label or field_lookup[field_id].field_type for field_id in missing_field_ids
                 )
-                self.session.add(artifact)
-                self.session.flush()
-                image_meta = {
-                    "mime": image_mime,
-                    "size": len(image_bytes),
-                    "sha256": image_sha,
-                    "filename": filename,
-                    "artifact_id": artifact.id,
-                    "path": storage_path,
-                }
-            elif image_required:
-                raise ValueError("Imagem de assinatura é obrigatória para este signatário.")
+                raise ValueError(f"Preencha os campos obrigatórios: {targets}")
+            image_payload = payload.signature_image
+            signed_pdf_raw = payload.signed_pdf or None
+            # Certificado, método e CPF são validados antes de decodificar, gravar e hashear imagem ou PDF assinado.
             certificate_subject = (payload.certificate_subject or "").strip() or None
             certificate_issuer = (payload.certificate_issuer or "").strip() or None
             certificate_serial = (payload.certificate_serial or "").strip() or None
@@ -730,51 +794,11 @@ class WorkflowService:
             signature_protocol = (payload.signature_protocol or "").strip() or None
             signature_type_label = (payload.signature_type or "").strip() or None
             signature_authentication = (payload.signature_authentication or "").strip() or None
-            signed_pdf_raw = payload.signed_pdf or None
-            signed_pdf_meta: Dict[str, Any] | None = None
-            if signed_pdf_raw:
-                try:
-                    signed_pdf_bytes = base64.b64decode(signed_pdf_raw, validate=True)
-                except (binascii.Error, ValueError) as exc:
-                    raise ValueError("PDF assinado em formato inválido.") from exc
-                if not signed_pdf_bytes:
-                    raise ValueError("PDF assinado está vazio.")
-                storage = get_storage()
-                storage_root = f"signatures/{document.tenant_id}/{document.id}"
-                signed_filename = (payload.signed_pdf_name or f"assinatura-digital-{request.id}.pdf").strip() or f"assinatura-digital-{request.id}.pdf"
-                signed_filename = signed_filename.replace("\\", "_").replace("/", "_")
-                signed_mime = (payload.signed_pdf_mime or "application/pdf").strip() or "application/pdf"
-                storage_path = storage.save_bytes(
-                    root=storage_root,
-                    name=signed_filename,
-                    data=signed_pdf_bytes,
-                )
-                storage_path = normalize_storage_path(storage_path)
-                signed_sha = (payload.signed_pdf_digest or "").strip() or hashlib.sha256(signed_pdf_bytes).hexdigest()
-                artifact = AuditArtifact(
-                    document_id=document.id,
-                    artifact_type="signature_pdf",
-                    storage_path=storage_path,
-                    sha256=signed_sha,
-                    issued_at=now,
-                )
-                self.session.add(artifact)
-                self.session.flush()
-                signed_pdf_meta = {
-                    "mime": signed_mime,
-                    "size": len(signed_pdf_bytes),
-                    "sha256": signed_sha,
-                    "filename": signed_filename,
-                    "artifact_id": artifact.id,
-                    "path": storage_path,
-                }
             signature_type_indicates_certificate = bool(
-                signature_type_label
-                and any(marker in signature_type_label for marker in ("digital", "certificado", "icp"))
+                signature_type_label and self._CERTIFICATE_MARKER_PATTERN.search(signature_type_label)
             )
-            signature_auth_value = (signature_authentication or "").strip().lower()
             signature_auth_indicates_certificate = bool(
-                signature_auth_value and any(marker in signature_auth_value for marker in ("digital", "certificado", "icp"))
+                signature_authentication and self._CERTIFICATE_MARKER_PATTERN_CI.search(signature_authentication)
             )
             certificate_used = any(
                 [
@@ -784,7 +808,7 @@ class WorkflowService:
                     certificate_thumbprint,
                     signature_type_indicates_certificate,
                     signature_auth_indicates_certificate,
-                    signed_pdf_meta,
+                    signed_pdf_raw,
                 ]
             )
             certificate_cpf = (
@@ -800,6 +824,128 @@ class WorkflowService:
                 if certificate_used
                 else None
             )
+            signature_method = (
+                getattr(party, "signature_method", None).strip().lower()
+                if party and getattr(party, "signature_method", None)
+                else "electronic"
+            )
+            normalized_party_cpf = self._normalize_cpf_value(getattr(party, "cpf", None)) if party else None
+            confirmed_cpf = self._normalize_cpf_value(payload.confirm_cpf)
+            if signature_method == "digital":
+                if not certificate_used:
+                    raise ValueError("Esta assinatura exige uso de certificado digital.")
+                if not normalized_party_cpf:
+                    raise ValueError("CPF do participante é obrigatório para assinaturas com certificado digital.")
+                if certificate_cpf:
+                    if certificate_cpf != normalized_party_cpf:
+                        raise ValueError("O CPF do certificado digital não corresponde ao participante cadastrado.")
+                else:
+                    if not confirmed_cpf:
+                        raise ValueError("Confirme o CPF cadastrado para continuar.")
+                    if confirmed_cpf != normalized_party_cpf:
+                        raise ValueError("O CPF informado não corresponde ao participante cadastrado.")
+            if signature_method == "electronic" and certificate_used:
+                raise ValueError("Esta assinatura deve ser realizada de forma eletrônica.")
+            # Imagem e PDF assinado vão para o mesmo backend e a mesma pasta do documento.
+            storage = get_storage() if image_payload or signed_pdf_raw else None
+            storage_root = f"signatures/{document.tenant_id}/{document.id}"
+            image_meta: Dict[str, Any] | None = None
+            image_upload: Future[str] | None = None
+            if image_payload:
+                if party and not party.allow_signature_image:
+                    raise ValueError("Upload de imagem não é permitido para este signatário.")
+                if not consent_given:
+                    raise ValueError("É necessário autorizar o uso da imagem para concluir a assinatura.")
+                image_bytes, detected_mime = self._decode_signature_image(image_payload)
+                image_mime = (payload.signature_image_mime or detected_mime or "image/png").lower()
+                if image_mime not in self.ALLOWED_SIGNATURE_IMAGE_MIMES:
+                    raise ValueError("Formato de imagem não suportado. Utilize PNG ou JPEG.")
+                if not image_bytes:
+                    raise ValueError("Imagem de assinatura vazia.")
+                if len(image_bytes) > self.MAX_SIGNATURE_IMAGE_BYTES:
+                    raise ValueError("Imagem de assinatura excede o limite de 2 MB.")
+                extension = self.ALLOWED_SIGNATURE_IMAGE_MIMES[image_mime]
+                filename = self._build_signature_filename(payload.signature_image_name, extension, request.id)
+                image_digest = _start_sha256(image_bytes)
+                image_upload = _UPLOAD_POOL.submit(
+                    storage.save_bytes,
+                    root=storage_root,
+                    name=filename,
+                    data=image_bytes,
+                )
+            elif image_required:
+                raise ValueError("Imagem de assinatura é obrigatória para este signatário.")
+            signed_pdf_meta: Dict[str, Any] | None = None
+            try:
+                if signed_pdf_raw:
+                    signed_filename = (payload.signed_pdf_name or f"assinatura-digital-{request.id}.pdf").strip() or f"assinatura-digital-{request.id}.pdf"
+                    signed_filename = signed_filename.translate(self._PATH_SEPARATORS)
+                    signed_mime = (payload.signed_pdf_mime or "application/pdf").strip() or "application/pdf"
+                    # Digest informado pelo cliente dispensa o hash; senão ele é feito no mesmo laço da gravação.
+                    client_digest = (payload.signed_pdf_digest or "").strip()
+                    hasher = None if client_digest else hashlib.sha256()
+                    signed_pdf_size = 0
+
+                    def decoded_pdf_chunks() -> Iterator[bytes]:
+                        nonlocal signed_pdf_size
+                        for chunk in _b64decode_chunks(signed_pdf_raw):
+                            signed_pdf_size += len(chunk)
+                            if hasher is not None:
+                                hasher.update(chunk)
+                            yield chunk
+
+                    try:
+                        storage_path = storage.save_chunks(
+                            root=storage_root,
+                            name=signed_filename,
+                            chunks=decoded_pdf_chunks(),
+                        )
+                    except (binascii.Error, ValueError) as exc:
+                        raise ValueError("PDF assinado em formato inválido.") from exc
+                    if not signed_pdf_size:
+                        raise ValueError("PDF assinado está vazio.")
+                    storage_path = normalize_storage_path(storage_path)
+                    signed_sha = client_digest or hasher.hexdigest()
+                    artifact = AuditArtifact(
+                        document_id=document.id,
+                        artifact_type="signature_pdf",
+                        storage_path=storage_path,
+                        sha256=signed_sha,
+                        issued_at=now,
+                    )
+                    self.session.add(artifact)
+                    signed_pdf_meta = {
+                        "mime": signed_mime,
+                        "size": signed_pdf_size,
+                        "sha256": signed_sha,
+                        "filename": signed_filename,
+                        "artifact_id": artifact.id,
+                        "path": storage_path,
+                    }
+                if image_upload is not None:
+                    storage_path = normalize_storage_path(image_upload.result())
+                    image_sha = image_digest.result()
+                    artifact = AuditArtifact(
+                        document_id=document.id,
+                        artifact_type="signature_image",
+                        storage_path=storage_path,
+                        sha256=image_sha,
+                        issued_at=now,
+                    )
+                    self.session.add(artifact)
+                    image_meta = {
+                        "mime": image_mime,
+                        "size": len(image_bytes),
+                        "sha256": image_sha,
+                        "filename": filename,
+                        "artifact_id": artifact.id,
+                        "path": storage_path,
+                    }
+            except BaseException:
+                # Falhou antes de o upload da imagem virar artefato: não deixa arquivo órfão no storage.
+                if image_upload is not None:
+                    self._discard_upload(storage, image_upload)
+                raise
             evidence_options: Dict[str, Any] = {
                 "typed_name": bool(typed_name_value),
                 "signature_image": bool(image_payload),
@@ -826,28 +972,6 @@ class WorkflowService:
             if signed_pdf_meta:
                 evidence_options["signed_pdf_artifact_id"] = str(signed_pdf_meta["artifact_id"])
                 evidence_options["signed_pdf_sha256"] = signed_pdf_meta["sha256"]
-            signature_method = (
-                getattr(party, "signature_method", None).strip().lower()
-                if party and getattr(party, "signature_method", None)
-                else "electronic"
-            )
-            normalized_party_cpf = self._normalize_cpf_value(getattr(party, "cpf", None)) if party else None
-            confirmed_cpf = self._normalize_cpf_value(payload.confirm_cpf)
-            if signature_method == "digital":
-                if not certificate_used:
-                    raise ValueError("Esta assinatura exige uso de certificado digital.")
-                if not normalized_party_cpf:
-                    raise ValueError("CPF do participante é obrigatório para assinaturas com certificado digital.")
-                if certificate_cpf:
-                    if certificate_cpf != normalized_party_cpf:
-                        raise ValueError("O CPF do certificado digital não corresponde ao participante cadastrado.")
-                else:
-                    if not confirmed_cpf:
-                        raise ValueError("Confirme o CPF cadastrado para continuar.")
-                    if confirmed_cpf != normalized_party_cpf:
-                        raise ValueError("O CPF informado não corresponde ao participante cadastrado.")
-            if signature_method == "electronic" and certificate_used:
-                raise ValueError("Esta assinatura deve ser realizada de forma eletrônica.")
             signature_entry = Signature(
                 signature_request_id=request.id,
                 signature_type=SignatureType.DIGITAL if certificate_used else SignatureType.ELECTRONIC,
@@ -872,7 +996,6 @@ class WorkflowService:
                 evidence_image_filename=image_meta.get("filename") if image_meta else None,
             )
             self.session.add(signature_entry)
-            self.session.flush()
             self._record_party_signed_notification(
                 document=document,
                 party=party,
@@ -883,44 +1006,48 @@ class WorkflowService:
                 "request_id": str(request.id),
                 "options": evidence_options,
             }
+            # Cada grupo entra de uma vez; só certificado e consentimento podem trazer None.
             if typed_name_value:
-                evidence_log["typed_name"] = typed_name_value
-                evidence_log["typed_name_hash"] = typed_name_hash
+                evidence_log |= {"typed_name": typed_name_value, "typed_name_hash": typed_name_hash}
             if image_meta:
-                evidence_log["image_artifact_id"] = str(image_meta["artifact_id"])
-                evidence_log["image_sha256"] = image_meta["sha256"]
-                evidence_log["image_mime_type"] = image_meta["mime"]
-                evidence_log["image_size_bytes"] = image_meta["size"]
-                evidence_log["image_filename"] = image_meta["filename"]
-                evidence_log["image_storage_path"] = image_meta["path"]
+                evidence_log |= {
+                    "image_artifact_id": str(image_meta["artifact_id"]),
+                    "image_sha256": image_meta["sha256"],
+                    "image_mime_type": image_meta["mime"],
+                    "image_size_bytes": image_meta["size"],
+                    "image_filename": image_meta["filename"],
+                    "image_storage_path": image_meta["path"],
+                }
             if certificate_used:
-                evidence_log["certificate_subject"] = certificate_subject
-                evidence_log["certificate_issuer"] = certificate_issuer
-                evidence_log["certificate_serial"] = certificate_serial
-                evidence_log["certificate_thumbprint"] = certificate_thumbprint
-                if certificate_cpf:
-                    evidence_log["certificate_cpf"] = certificate_cpf
-                if signature_protocol:
-                    evidence_log["signature_protocol"] = signature_protocol
-                if signature_type_label:
-                    evidence_log["signature_type_label"] = signature_type_label
-                if signature_authentication:
-                    evidence_log["signature_authentication"] = signature_authentication
+                certificate_evidence = {
+                    "certificate_subject": certificate_subject,
+                    "certificate_issuer": certificate_issuer,
+                    "certificate_serial": certificate_serial,
+                    "certificate_thumbprint": certificate_thumbprint,
+                    "certificate_cpf": certificate_cpf,
+                    "signature_protocol": signature_protocol,
+                    "signature_type_label": signature_type_label,
+                    "signature_authentication": signature_authentication,
+                }
+                evidence_log |= {key: value for key, value in certificate_evidence.items() if value is not None}
             if signed_pdf_meta:
-                evidence_log["signed_pdf_artifact_id"] = str(signed_pdf_meta["artifact_id"])
-                evidence_log["signed_pdf_sha256"] = signed_pdf_meta["sha256"]
-                evidence_log["signed_pdf_filename"] = signed_pdf_meta["filename"]
-                evidence_log["signed_pdf_size_bytes"] = signed_pdf_meta["size"]
-                evidence_log["signed_pdf_mime_type"] = signed_pdf_meta["mime"]
-                evidence_log["signed_pdf_storage_path"] = signed_pdf_meta["path"]
+                evidence_log |= {
+                    "signed_pdf_artifact_id": str(signed_pdf_meta["artifact_id"]),
+                    "signed_pdf_sha256": signed_pdf_meta["sha256"],
+                    "signed_pdf_filename": signed_pdf_meta["filename"],
+                    "signed_pdf_size_bytes": signed_pdf_meta["size"],
+                    "signed_pdf_mime_type": signed_pdf_meta["mime"],
+                    "signed_pdf_storage_path": signed_pdf_meta["path"],
+                }
             if consent_given:
-                evidence_log["consent_version"] = consent_version
-                if consent_text:
-                    evidence_log["consent_text"] = consent_text
-                if consent_given_at:
-                    evidence_log["consent_given_at"] = consent_given_at.isoformat()
+                consent_evidence = {
+                    "consent_version": consent_version,
+                    "consent_text": consent_text or None,
+                    "consent_given_at": consent_given_at.isoformat() if consent_given_at else None,
+                }
+                evidence_log |= {key: value for key, value in consent_evidence.items() if value is not None}
             if field_value_capture:
-                evidence_log["field_signatures"] = list(field_value_capture.keys())
+                evidence_log["field_signatures"] = list(field_value_capture)
             request.status = SignatureRequestStatus.SIGNED
             step.completed_at = now
         elif payload.action == "refuse":
@@ -956,7 +1083,7 @@ class WorkflowService:
                 document_id=document.id,
                 ip_address=ip,
                 user_agent=user_agent,
-                details={key: value for key, value in evidence_log.items() if value is not None},
+                details=evidence_log,
             )
         if workflow.status == WorkflowStatus.COMPLETED and document.status == DocumentStatus.COMPLETED:
             document_service = DocumentService(self.session)
@@ -984,26 +1111,25 @@ class WorkflowService:
                     authority = (
                         signature_result.timestamp.authority if signature_result.timestamp else None
                     )
-                    audit_service.record_event(
-                        event_type="document_signed",
-                        actor_id=None,
-                        actor_role=None,
-                        document_id=document.id,
-                        details={
-                            "version_id": str(final_version.id),
-                            "sha256": final_version.sha256,
-                            "authority": authority,
-                            "issued_at": issued_at,
-                        },
+                    # document_signed + avisos ICP num único INSERT/commit.
+                    audit_service.record_events(
+                        [
+                            {
+                                "event_type": "document_signed",
+                                "document_id": document.id,
+                                "details": {
+                                    "version_id": str(final_version.id),
+                                    "sha256": final_version.sha256,
+                                    "authority": authority,
+                                    "issued_at": issued_at,
+                                },
+                            },
+                            *(
+                                {"event_type": "icp_warning", "document_id": document.id, "details": {"warning": warning}}
+                                for warning in signature_result.warnings
+                            ),
+                        ]
                     )
-                    for warning in signature_result.warnings:
-                        audit_service.record_event(
-                            event_type="icp_warning",
-                            actor_id=None,
-                            actor_role=None,
-                            document_id=document.id,
-                            details={"warning": warning},
-                        )
             existing_artifact = self.session.exec(
                 select(AuditArtifact)
                 .where(AuditArtifact.document_id == document.id)
@@ -1046,7 +1172,11 @@ class WorkflowService:
         ip: str | None = None,
         user_agent: str | None = None,
     ) -> SignatureRequest:
-        request = self.session.get(SignatureRequest, UUID(str(request_id)))
+        request = self.session.get(
+            SignatureRequest,
+            UUID(str(request_id)),
+            options=self._SIGNING_LOAD_OPTIONS,
+        )
         if not request:
             raise ValueError("Request not found")
         step = self.session.get(WorkflowStep, request.workflow_step_id)
@@ -1095,12 +1225,32 @@ class WorkflowService:
         )
         self.session.add(notification)
 
-    def _advance_workflow(self, workflow: WorkflowInstance, document: Document) -> None:
-        steps = self.session.exec(
+    def _load_workflow_steps(self, workflow_id: UUID) -> list[WorkflowStep]:
+        # Uma consulta para os steps (+ parte via JOIN) e outra para todas as solicitações,
+        # em vez de um SELECT de SignatureRequest por step.
+        return self.session.exec(
             select(WorkflowStep)
-            .where(WorkflowStep.workflow_id == workflow.id)
+            .where(WorkflowStep.workflow_id == workflow_id)
+            .options(selectinload(WorkflowStep.signature_requests), joinedload(WorkflowStep.party))
             .order_by(WorkflowStep.step_index)
         ).all()
+
+    def _request_notification_context(
+        self,
+        request: SignatureRequest,
+        documents: Dict[UUID, Document | None],
+        requester_names: Dict[UUID | None, str | None],
+    ) -> Tuple[Document | None, str | None]:
+        if request.document_id not in documents:
+            documents[request.document_id] = self.session.get(Document, request.document_id)
+        request_doc = documents[request.document_id]
+        tenant_id = getattr(request_doc, "tenant_id", None)
+        if tenant_id not in requester_names:
+            requester_names[tenant_id] = self._resolve_company_name(tenant_id)
+        return request_doc, requester_names[tenant_id]
+
+    def _advance_workflow(self, workflow: WorkflowInstance, document: Document) -> None:
+        steps = self._load_workflow_steps(workflow.id)
         if workflow.status == WorkflowStatus.REJECTED:
             self.session.add(workflow)
             return
@@ -1111,31 +1261,29 @@ class WorkflowService:
             self.session.add(workflow)
             self.session.add(document)
             return
-        now = datetime.utcnow()
+        documents: Dict[UUID, Document | None] = {document.id: document}
+        requester_names: Dict[UUID | None, str | None] = {}
         for step in steps:
             if step.completed_at:
                 continue
-            requests = self.session.exec(
-                select(SignatureRequest).where(SignatureRequest.workflow_step_id == step.id)
-            ).all()
-            for request in requests:
+            for request in step.signature_requests:
                 if request.status == SignatureRequestStatus.PENDING:
                     request.status = SignatureRequestStatus.SENT
                     token = self.issue_signature_token(request.id)
                     self.session.add(request)
-                    if self.notification_service and (step.party or step.party_id):
-                        party = step.party or self.session.get(DocumentParty, step.party_id)
-                        if party:
-                            request_doc = self.session.get(Document, request.document_id)
-                            requester_name = self._resolve_company_name(getattr(request_doc, "tenant_id", None)) if request_doc else None
-                            self.notification_service.notify_signature_request(
-                                request=request,
-                                party=party,
-                                document=request_doc,
-                                token=token,
-                                step=step,
-                                requester_name=requester_name,
-                            )
+                    party = step.party if self.notification_service else None
+                    if party:
+                        request_doc, requester_name = self._request_notification_context(
+                            request, documents, requester_names
+                        )
+                        self.notification_service.notify_signature_request(
+                            request=request,
+                            party=party,
+                            document=request_doc,
+                            token=token,
+                            step=step,
+                            requester_name=requester_name,
+                        )
             break
 
     def get_request_workflow(self, request: SignatureRequest) -> WorkflowInstance | None:
@@ -1159,29 +1307,25 @@ class WorkflowService:
         )
         if not workflow:
             raise ValueError("Workflow not found for document")
-        steps = self.session.exec(
-            select(WorkflowStep)
-            .where(WorkflowStep.workflow_id == workflow.id)
-            .order_by(WorkflowStep.step_index)
-        ).all()
+        steps = self._load_workflow_steps(workflow.id)
         if not steps:
             raise ValueError("No workflow steps to resend")
         if not self.notification_service:
             raise ValueError("Notification service is not configured")
         notified = 0
+        documents: Dict[UUID, Document | None] = {document.id: document}
+        requester_names: Dict[UUID | None, str | None] = {}
         for step in steps:
-            requests = self.session.exec(
-                select(SignatureRequest).where(SignatureRequest.workflow_step_id == step.id)
-            ).all()
-            for request in requests:
+            for request in step.signature_requests:
                 if request.status in {SignatureRequestStatus.PENDING, SignatureRequestStatus.SENT}:
                     token = self.issue_signature_token(request.id)
                     request.status = SignatureRequestStatus.SENT
                     self.session.add(request)
-                    party = step.party or self.session.get(DocumentParty, step.party_id)
+                    party = step.party
                     if party:
-                        request_doc = self.session.get(Document, request.document_id)
-                        requester_name = self._resolve_company_name(getattr(request_doc, "tenant_id", None)) if request_doc else None
+                        request_doc, requester_name = self._request_notification_context(
+                            request, documents, requester_names
+                        )
                         self.notification_service.notify_signature_request(
                             request=request,
                             party=party,
@@ -1245,26 +1389,34 @@ class WorkflowService:
         mime: str | None = None
         encoded = data
         if data.startswith("data:"):
-            try:
-                header, encoded = data.split(",", 1)
-            except ValueError as exc:
-                raise ValueError("Imagem de assinatura em formato inválido.") from exc
+            header, separator, encoded = data.partition(",")
+            if not separator:
+                raise ValueError("Imagem de assinatura em formato inválido.")
             if ";base64" not in header:
                 raise ValueError("Imagem de assinatura deve estar codificada em base64.")
             if ":" in header:
                 mime = header.split(";", 1)[0].split(":", 1)[1]
         try:
-            content = base64.b64decode(encoded, validate=True)
+            content = _b64decode(encoded)
         except (binascii.Error, ValueError) as exc:
             raise ValueError("Imagem de assinatura inválida.") from exc
         return content, mime
 
+    @staticmethod
+    def _discard_upload(storage: Any, upload: Future[str]) -> None:
+        if upload.cancel():
+            return
+        try:
+            storage.delete(upload.result())
+        except Exception:
+            logger.warning("Falha ao descartar upload de assinatura", exc_info=True)
+
     @classmethod
     def _build_signature_filename(cls, provided: str | None, extension: str, request_id: UUID) -> str:
         base = (provided or f"assinatura-{request_id}").strip()
         if not base:
             base = f"assinatura-{request_id}"
-        base = base.replace("\\", "_").replace("/", "_")
+        base = base.translate(cls._PATH_SEPARATORS)
         if "." not in base:
             base = f"{base}{extension}"
         return base
@@ -1283,7 +1435,7 @@ class WorkflowService:
         if document.status == DocumentStatus.DELETED:
             raise ValueError("Documento está na lixeira e não pode ser assinado")
         self.session.refresh(document)
-        party = step.party or self.session.get(DocumentParty, step.party_id)
+        party = step.party
         signature = self.session.exec(
             select(Signature)
             .where(Signature.signature_request_id == request.id)
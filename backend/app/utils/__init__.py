@@ -1,4 +1,5 @@
 from app.utils.email_validation import normalize_deliverable_email
+from app.utils.ids import as_uuid
 from app.utils.security import (
     create_access_token,
     decode_token,
@@ -7,6 +8,7 @@ from app.utils.security import (
 )
 
 __all__ = [
+    "as_uuid",
     "create_access_token",
     "decode_token",
     "get_password_hash",
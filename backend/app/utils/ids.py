@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+
+def as_uuid(value: str | UUID) -> UUID:
+    """Coerce an id to UUID, returning UUID instances unchanged (no str() / re-parse round trip)."""
+    return value if isinstance(value, UUID) else UUID(str(value))
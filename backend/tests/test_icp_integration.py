@@ -27,3 +27,29 @@ def test_icp_sign_and_timestamp(tmp_path):
         pytest.skip("ICP certificate not configured for signing.")
     assert result.signed_pdf != pdf_bytes
     assert result.sha256
+
+
+def test_local_timestamp_carries_token_digest():
+    import hashlib
+
+    icp = IcpIntegrationService(timestamp_url=None)
+    timestamp = icp.request_timestamp(b"%PDF-1.4 conteudo")
+    assert timestamp.token_sha256 == hashlib.sha256(timestamp.token).hexdigest()
+
+
+def test_fallback_signature_reuses_pdf_digest():
+    import hashlib
+    import io
+
+    from pypdf import PdfReader
+
+    pdf_bytes = b"%PDF-1.4 conteudo"
+    pdf_digest = hashlib.sha256(pdf_bytes).hexdigest()
+    icp = IcpIntegrationService(timestamp_url=None)
+    result = icp.apply_security(pdf_bytes)
+
+    # Local timestamp token is the hex digest of the input PDF.
+    assert result.timestamp.token == pdf_digest.encode("utf-8")
+    assert result.sha256 == hashlib.sha256(result.signed_pdf).hexdigest()
+    if result.signed_pdf is not pdf_bytes:
+        assert PdfReader(io.BytesIO(result.signed_pdf)).metadata["/NSDigest"] == pdf_digest
@@ -6,6 +6,7 @@ import base64
 import hashlib
 
 import pytest
+from pypdf import PdfReader
 from sqlmodel import Session, select
 
 from app.models.audit import AuditLog
@@ -16,6 +17,7 @@ from app.models.workflow import Signature, SignatureRequest, WorkflowStatus
 from app.schemas.workflow import SignatureAction, WorkflowDispatch
 from app.services import document as document_module
 from app.services import report as report_module
+from app.services import storage as storage_module
 from app.services.notification import NotificationService
 from app.services.storage import get_storage, normalize_storage_path
 from app.services.workflow import WorkflowService
@@ -67,9 +69,10 @@ class DummyNotification(NotificationService):
 def storage_patch(tmp_path, monkeypatch):
     base = tmp_path / "storage"
     base.mkdir(parents=True, exist_ok=True)
-    # Patch both modules that cache BASE_STORAGE at import time
+    # Patch the modules that cache BASE_STORAGE at import time, plus the storage override registry
     monkeypatch.setattr(document_module, "BASE_STORAGE", base, raising=True)
     monkeypatch.setattr(report_module, "BASE_STORAGE", base, raising=True)
+    monkeypatch.setattr(storage_module, "_base_storage_override", base, raising=True)
     return base
 
 
@@ -223,8 +226,8 @@ def test_final_report_generated_with_timestamp_and_email(db_session: Session, st
     report_path = Path(report_artifact.storage_path)
     if not report_path.is_absolute():
         report_path = storage_patch / report_path
-    pdf_bytes = report_path.read_bytes()
-    pdf_text = pdf_bytes.decode("latin-1", errors="ignore")
+    # Report pages are compressed; extract the text instead of scanning raw bytes.
+    pdf_text = "\n".join(page.extract_text() or "" for page in PdfReader(report_path).pages)
     assert "Dados fornecidos pelo" in pdf_text
     assert "Maria Silva" in pdf_text
 
@@ -383,3 +383,47 @@ def test_notify_workflow_completed_with_attachments(monkeypatch, tmp_path):
 
     sent_event_types = {event["event_type"] for event in audit.events}
     assert "workflow_completed_notification_sent" in sent_event_types
+
+
+def test_notify_workflow_completed_sendgrid_encodes_attachment_once(monkeypatch, tmp_path):
+    import base64
+
+    from app.services import notification as notification_module
+
+    posted = []
+
+    class FakeResponse:
+        def raise_for_status(self):
+            return None
+
+    def fake_post(url, headers=None, json=None, timeout=None):
+        posted.append(json)
+        return FakeResponse()
+
+    encode_calls = []
+    real_b64encode = base64.b64encode
+
+    def counting_b64encode(data):
+        encode_calls.append(len(data))
+        return real_b64encode(data)
+
+    monkeypatch.setattr(notification_module.httpx, "post", fake_post)
+    monkeypatch.setattr(notification_module._b64, "b64encode", counting_b64encode)
+
+    service = NotificationService(audit_service=AuditStub(), session=DummySession())
+    service.configure_sendgrid(api_key="key", sender="Sender <sender@example.com>")
+
+    report_path = tmp_path / "relatorio-final.pdf"
+    report_path.write_bytes(b"%PDF-1.4 test report")
+
+    service.notify_workflow_completed(
+        document=SimpleNamespace(id="doc-1", name="Contrato XYZ"),
+        parties=[SimpleNamespace(email="signer@example.com")],
+        attachments=[report_path],
+        extra_recipients=["owner@example.com"],
+    )
+
+    assert len(posted) == 2
+    expected = real_b64encode(b"%PDF-1.4 test report").decode("ascii")
+    assert all(payload["attachments"][0]["content"] == expected for payload in posted)
+    assert len(encode_calls) == 1
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import io
+
+from pypdf import PdfReader
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph
+
+from app.services import report as report_module
+
+
+def _story() -> list:
+    styles = getSampleStyleSheet()
+    return [Paragraph("Relatório de auditoria", styles["Heading1"]), Paragraph("Linha &amp; detalhe", styles["BodyText"])]
+
+
+def test_render_report_pdf_inline_and_in_worker_pool(monkeypatch) -> None:
+    decorator = report_module._ReportPageDecorator(document_label="Documento X", generated_label="Gerado em agora")
+
+    monkeypatch.setattr(report_module.settings, "report_render_workers", 0)
+    inline_pdf = report_module.render_report_pdf(_story(), title="Relatório", page_decorator=decorator)
+    assert inline_pdf.startswith(b"%PDF")
+
+    monkeypatch.setattr(report_module.settings, "report_render_workers", 1)
+    monkeypatch.setattr(report_module, "_render_pool", None)
+    try:
+        pooled_pdf = report_module.render_report_pdf(_story(), title="Relatório", page_decorator=decorator)
+    finally:
+        pool = report_module._render_pool
+        if pool is not None:
+            pool.shutdown()
+    assert pooled_pdf.startswith(b"%PDF")
+    assert "Documento X" in PdfReader(io.BytesIO(pooled_pdf)).pages[0].extract_text()
+
+
+def test_details_serialization_matches_stdlib_json() -> None:
+    import json
+
+    details = {"ação": "assinado", "campos": [1, 2.5, {"ok": True, "vazio": None}], "grande": 10**30, "lista": []}
+    assert report_module._dump_details(details) == json.dumps(details, ensure_ascii=False, indent=2)
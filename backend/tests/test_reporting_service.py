@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlmodel import Session, select
+
+from app.models.document import Document, DocumentParty, DocumentStatus
+from app.models.tenant import Area, Tenant
+from app.models.user import User
+from app.models.workflow import Signature, SignatureRequest, SignatureType, WorkflowInstance, WorkflowStep
+from app.services.reporting import DocumentReportFilters, ReportingService
+
+
+def _seed_document_with_signatures(db: Session) -> Tenant:
+    tenant = Tenant(name="Tenant", slug=f"tenant-{uuid4().hex[:6]}")
+    area = Area(name="Area", tenant_id=tenant.id)
+    owner = User(
+        tenant_id=tenant.id,
+        email=f"owner_{uuid4().hex[:6]}@example.com",
+        cpf="10987654321",
+        full_name="Owner",
+        password_hash="hash",
+    )
+    document = Document(
+        tenant_id=tenant.id,
+        area_id=area.id,
+        name="Contrato",
+        status=DocumentStatus.IN_PROGRESS,
+        created_by_id=owner.id,
+    )
+    db.add_all([tenant, area, owner, document])
+    db.flush()
+
+    workflow = WorkflowInstance(document_id=document.id, started_at=datetime.utcnow())
+    previous_workflow = WorkflowInstance(document_id=document.id, started_at=datetime(2020, 1, 1))
+    db.add_all([previous_workflow, workflow])
+    db.flush()
+
+    signature_types = [SignatureType.DIGITAL, SignatureType.ELECTRONIC, SignatureType.ELECTRONIC, None]
+    for index, signature_type in enumerate(signature_types, start=1):
+        party = DocumentParty(
+            document_id=document.id,
+            full_name=f"Parte {index}",
+            email=f"parte{index}@example.com",
+            role="signer",
+            order_index=index,
+        )
+        db.add(party)
+        db.flush()
+        step = WorkflowStep(workflow_id=workflow.id, party_id=party.id, step_index=index)
+        db.add(step)
+        db.flush()
+        request = SignatureRequest(workflow_step_id=step.id, document_id=document.id)
+        db.add(request)
+        db.flush()
+        if signature_type is not None:
+            db.add(Signature(signature_request_id=request.id, signature_type=signature_type, signed_at=datetime.utcnow()))
+    db.commit()
+    return tenant
+
+
+def test_list_documents_summary_counters_match_party_listing(db_session: Session) -> None:
+    tenant = _seed_document_with_signatures(db_session)
+    service = ReportingService(db_session)
+
+    full = service.list_documents(tenant.id, DocumentReportFilters())
+    summary = service.list_documents(tenant.id, DocumentReportFilters(), include_parties=False)
+
+    assert len(full.items) == len(summary.items) == 1
+    full_row, summary_row = full.items[0], summary.items[0]
+    assert full_row.workflow_started_at is not None and full_row.workflow_started_at.year > 2020
+    assert len(full_row.parties) == 4
+    assert summary_row.parties == []
+    counters = ("total_parties", "signed_parties", "pending_parties", "signed_digital", "signed_electronic")
+    assert [getattr(summary_row, name) for name in counters] == [getattr(full_row, name) for name in counters]
+    assert (summary_row.total_parties, summary_row.signed_parties) == (4, 3)
+    assert (summary_row.signed_digital, summary_row.signed_electronic) == (1, 2)
+
+
+def test_list_documents_summary_classifies_parties_by_latest_signature(db_session: Session) -> None:
+    tenant = _seed_document_with_signatures(db_session)
+    # Parte 1 assinou digitalmente; uma assinatura eletrônica mais recente passa a classificá-la.
+    first_request = db_session.exec(
+        select(SignatureRequest)
+        .join(WorkflowStep, SignatureRequest.workflow_step_id == WorkflowStep.id)
+        .where(WorkflowStep.step_index == 1)
+    ).one()
+    db_session.add(
+        Signature(
+            signature_request_id=first_request.id,
+            signature_type=SignatureType.ELECTRONIC,
+            signed_at=datetime.utcnow() + timedelta(minutes=5),
+        )
+    )
+    db_session.commit()
+    service = ReportingService(db_session)
+
+    full_row = service.list_documents(tenant.id, DocumentReportFilters()).items[0]
+    summary_row = service.list_documents(tenant.id, DocumentReportFilters(), include_parties=False).items[0]
+
+    counters = ("total_parties", "signed_parties", "pending_parties", "signed_digital", "signed_electronic")
+    assert [getattr(summary_row, name) for name in counters] == [getattr(full_row, name) for name in counters]
+    assert (summary_row.signed_parties, summary_row.signed_digital, summary_row.signed_electronic) == (3, 0, 3)
+
+
+def test_list_documents_filters_by_party_signature_method(db_session: Session) -> None:
+    tenant = _seed_document_with_signatures(db_session)
+    service = ReportingService(db_session)
+
+    electronic = service.list_documents(tenant.id, DocumentReportFilters(signature_method="Electronic"))
+    digital = service.list_documents(tenant.id, DocumentReportFilters(signature_method="digital"))
+
+    assert electronic.total == 1 and len(electronic.items) == 1
+    assert electronic.status_summary == {DocumentStatus.IN_PROGRESS.value: 1}
+    assert digital.total == 0 and digital.items == []
+
+
+def test_list_documents_keyset_pagination_walks_all_documents(db_session: Session) -> None:
+    tenant = _seed_document_with_signatures(db_session)
+    area_id = db_session.exec(select(Document.area_id).where(Document.tenant_id == tenant.id)).first()
+    owner_id = db_session.exec(select(User.id).where(User.tenant_id == tenant.id)).first()
+    for index in range(4):
+        db_session.add(
+            Document(tenant_id=tenant.id, area_id=area_id, name=f"Extra {index}", created_by_id=owner_id)
+        )
+    db_session.commit()
+    service = ReportingService(db_session)
+
+    seen: list = []
+    filters = DocumentReportFilters()
+    while True:
+        page = service.list_documents(tenant.id, filters, limit=2, include_parties=False)
+        assert page.total == 5
+        seen.extend(item.document_id for item in page.items)
+        if page.next_cursor is None:
+            break
+        filters = DocumentReportFilters(cursor=(page.next_cursor.created_at, page.next_cursor.document_id))
+
+    assert len(seen) == len(set(seen)) == 5
+    assert [item.document_id for item in service.list_documents(tenant.id, DocumentReportFilters()).items] == seen
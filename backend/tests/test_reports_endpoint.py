@@ -0,0 +1,23 @@
+from uuid import uuid4
+
+from fastapi import status
+
+from app.core.config import settings
+from tests.conftest import auth_headers, register_and_login
+
+
+def test_document_report_rejects_half_cursor(client):
+    token, _ = register_and_login(client, "reports@example.com", "StrongPass!123")
+    url = f"{settings.api_v1_str}/reports/documents"
+
+    only_id = client.get(url, params={"cursor_id": str(uuid4())}, headers=auth_headers(token))
+    only_created = client.get(url, params={"cursor_created_at": "2026-01-01T00:00:00"}, headers=auth_headers(token))
+    both = client.get(
+        url,
+        params={"cursor_id": str(uuid4()), "cursor_created_at": "2026-01-01T00:00:00"},
+        headers=auth_headers(token),
+    )
+
+    assert only_id.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert only_created.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert both.status_code == status.HTTP_200_OK
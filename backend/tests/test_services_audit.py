@@ -58,6 +58,27 @@ def test_audit_service_records_events(db_session: Session, sample_context: dict)
     assert stored.details["workflow_id"] == "wf-1"
 
 
+def test_audit_service_records_events_in_bulk(db_session: Session, sample_context: dict) -> None:
+    service = AuditService(db_session)
+    document = sample_context["document"]
+
+    service.record_events(
+        [
+            {"event_type": "document_signed", "document_id": document.id, "details": {"sha256": "abc"}},
+            {"event_type": "icp_warning", "document_id": document.id, "details": {"warning": "sem carimbo"}},
+            {"event_type": "icp_warning", "document_id": document.id},
+        ]
+    )
+    service.record_events([])
+
+    stored = db_session.exec(select(AuditLog).order_by(AuditLog.event_type)).all()
+    assert [log.event_type for log in stored] == ["document_signed", "icp_warning", "icp_warning"]
+    assert all(log.document_id == document.id for log in stored)
+    assert stored[0].details == {"sha256": "abc"}
+    assert sorted((log.details for log in stored[1:]), key=len) == [{}, {"warning": "sem carimbo"}]
+    assert len({log.id for log in stored}) == 3
+
+
 def test_audit_service_filters_by_tenant(db_session: Session, sample_context: dict) -> None:
     service = AuditService(db_session)
     tenant = sample_context["tenant"]
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import io
+
+from app.core.config import settings
+from app.services import storage as storage_module
+from app.services.storage import S3Storage, get_storage
+
+
+def _enable_s3(monkeypatch) -> None:
+    monkeypatch.setenv("NACIONALSIGN_ALLOW_S3_IN_TESTS", "1")
+    monkeypatch.delenv("NACIONALSIGN_STORAGE", raising=False)
+    monkeypatch.setattr(settings, "debug", False)
+    monkeypatch.setattr(settings, "s3_endpoint_url", "http://minio.test:9000")
+    monkeypatch.setattr(settings, "s3_access_key", "access")
+    monkeypatch.setattr(settings, "s3_secret_key", "secret")
+    monkeypatch.setattr(settings, "s3_bucket_documents", "docs")
+    storage_module._s3_storage.cache_clear()
+    storage_module._s3_client.cache_clear()
+
+
+def test_get_storage_reuses_s3_client(monkeypatch) -> None:
+    _enable_s3(monkeypatch)
+
+    first = get_storage()
+    second = get_storage()
+
+    assert isinstance(first, S3Storage)
+    assert first is second
+    assert first.client.meta.config.max_pool_connections == 50
+
+
+class _RecordingS3Client:
+    def __init__(self) -> None:
+        self.put: list[str] = []
+        self.parts: dict[int, bytes] = {}
+        self.completed: list[dict] = []
+        self.stored = b""
+        self.ranges: list[str] = []
+
+    def put_object(self, *, Bucket: str, Key: str, Body: bytes) -> dict:
+        self.put.append(Key)
+        return {}
+
+    def create_multipart_upload(self, *, Bucket: str, Key: str) -> dict:
+        return {"UploadId": "upload-1"}
+
+    def upload_part(self, *, Bucket: str, Key: str, PartNumber: int, UploadId: str, Body: bytes) -> dict:
+        self.parts[PartNumber] = Body
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, *, Bucket: str, Key: str, UploadId: str, MultipartUpload: dict) -> dict:
+        self.completed.append(MultipartUpload)
+        return {}
+
+    def get_object(self, *, Bucket: str, Key: str, Range: str, IfMatch: str | None = None) -> dict:
+        from botocore.exceptions import ClientError
+
+        self.ranges.append(Range)
+        etag = f'"{hash(self.stored)}"'
+        if IfMatch is not None and IfMatch != etag:
+            raise ClientError({"Error": {"Code": "PreconditionFailed"}}, "GetObject")
+        start, end = (int(value) for value in Range.removeprefix("bytes=").split("-"))
+        chunk = self.stored[start : end + 1]
+        return {
+            "Body": io.BytesIO(chunk),
+            "ContentRange": f"bytes {start}-{start + len(chunk) - 1}/{len(self.stored)}",
+            "ETag": etag,
+        }
+
+
+def test_s3_save_bytes_uses_multipart_for_large_payloads(monkeypatch) -> None:
+    monkeypatch.setattr(storage_module, "S3_MULTIPART_THRESHOLD", 10)
+    monkeypatch.setattr(storage_module, "S3_PART_SIZE", 4)
+    client = _RecordingS3Client()
+    storage = S3Storage(bucket="docs", client=client)
+
+    assert storage.save_bytes(root="small", name="a.pdf", data=b"123") == "s3://docs/small/a.pdf"
+    assert storage.save_bytes(root="big", name="b.pdf", data=b"0123456789ab") == "s3://docs/big/b.pdf"
+
+    assert client.put == ["small/a.pdf"]
+    assert b"".join(client.parts[number] for number in sorted(client.parts)) == b"0123456789ab"
+    assert client.completed == [
+        {"Parts": [{"PartNumber": n, "ETag": f"etag-{n}"} for n in (1, 2, 3)]}
+    ]
+
+
+def test_s3_load_bytes_fetches_large_objects_in_ranges(monkeypatch) -> None:
+    monkeypatch.setattr(storage_module, "S3_PART_SIZE", 4)
+    client = _RecordingS3Client()
+    storage = S3Storage(bucket="docs", client=client)
+
+    client.stored = b"abc"
+    assert storage.load_bytes("s3://docs/small.pdf") == b"abc"
+    assert client.ranges == ["bytes=0-3"]
+
+    client.stored, client.ranges = b"0123456789", []
+    assert storage.load_bytes("s3://docs/big.pdf") == b"0123456789"
+    assert sorted(client.ranges) == ["bytes=0-3", "bytes=4-7", "bytes=8-9"]
+
+
+def test_s3_load_bytes_fails_when_object_changes_mid_download(monkeypatch) -> None:
+    import pytest
+    from botocore.exceptions import ClientError
+
+    monkeypatch.setattr(storage_module, "S3_PART_SIZE", 4)
+    client = _RecordingS3Client()
+    storage = S3Storage(bucket="docs", client=client)
+    original_get = client.get_object
+
+    def overwrite_after_first_range(**kwargs) -> dict:
+        response = original_get(**kwargs)
+        client.stored = b"XYZ"
+        return response
+
+    client.stored = b"0123456789"
+    monkeypatch.setattr(client, "get_object", overwrite_after_first_range)
+    with pytest.raises(ClientError):
+        storage.load_bytes("s3://docs/big.pdf")
+
+    def truncated(**kwargs) -> dict:
+        response = original_get(**kwargs)
+        if kwargs["Range"] != "bytes=0-3":
+            response["Body"] = io.BytesIO(response["Body"].read()[:-1])
+        return response
+
+    client.stored = b"0123456789"
+    monkeypatch.setattr(client, "get_object", truncated)
+    with pytest.raises(OSError, match="Leitura incompleta"):
+        storage.load_bytes("s3://docs/big.pdf")
+
+
+def test_s3_presigned_url_is_reused_until_near_expiry(monkeypatch) -> None:
+    class _Signer:
+        calls = 0
+
+        def generate_presigned_url(self, operation, Params, ExpiresIn):  # noqa: N803
+            _Signer.calls += 1
+            return f"https://signed/{Params['Key']}?n={_Signer.calls}&exp={ExpiresIn}"
+
+    clock = [1000.0]
+    monkeypatch.setattr(storage_module.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(storage_module, "_presigned_url_cache", storage_module.OrderedDict())
+    storage = S3Storage(bucket="docs", client=_Signer())
+
+    first = storage.presigned_url(path="s3://docs/a.pdf", expires_seconds=600)
+    assert storage.presigned_url(path="s3://docs/a.pdf", expires_seconds=600) == first
+    assert storage.presigned_url(path="s3://docs/a.pdf", expires_seconds=300) != first
+    assert _Signer.calls == 2
+
+    clock[0] += 600 - storage_module.PRESIGNED_URL_MARGIN
+    assert storage.presigned_url(path="s3://docs/a.pdf", expires_seconds=600) != first
+    assert _Signer.calls == 3
+
+
+def test_s3_presigned_url_cache_is_scoped_to_storage_configuration(monkeypatch) -> None:
+    class _Signer:
+        def __init__(self, name: str) -> None:
+            self.name = name
+
+        def generate_presigned_url(self, operation, Params, ExpiresIn):  # noqa: N803
+            return f"https://{self.name}/{Params['Key']}"
+
+    monkeypatch.setattr(storage_module, "_presigned_url_cache", storage_module.OrderedDict())
+    first = S3Storage(bucket="docs", client=_Signer("minio-a"), cache_scope=("http://a:9000", "key-a", "us-east-1"))
+    second = S3Storage(bucket="docs", client=_Signer("minio-b"), cache_scope=("http://b:9000", "key-b", "us-east-1"))
+
+    assert first.presigned_url(path="s3://docs/a.pdf") == "https://minio-a/a.pdf"
+    assert second.presigned_url(path="s3://docs/a.pdf") == "https://minio-b/a.pdf"
+
+
+def test_effective_base_storage_uses_registered_override(monkeypatch, tmp_path) -> None:
+    monkeypatch.delenv("NACIONALSIGN_STORAGE", raising=False)
+    monkeypatch.setattr(storage_module, "_base_storage_override", storage_module.get_base_storage_override())
+
+    storage_module.set_base_storage_override(tmp_path / "one")
+    assert storage_module._effective_base_storage() == tmp_path / "one"
+    assert storage_module.normalize_storage_path(tmp_path / "one" / "docs" / "a.pdf") == "docs/a.pdf"
+
+    monkeypatch.setenv("NACIONALSIGN_STORAGE", str(tmp_path / "env"))
+    assert storage_module._effective_base_storage() == storage_module.BASE_STORAGE
+    monkeypatch.delenv("NACIONALSIGN_STORAGE")
+
+    # Sem override registrado: cai direto em BASE_STORAGE (antes recursava sem fim).
+    storage_module.set_base_storage_override(None)
+    assert storage_module._effective_base_storage() == storage_module.BASE_STORAGE
+
+
+def test_local_save_stream_copies_from_file_and_buffer(tmp_path) -> None:
+    from app.services.storage import LocalStorage
+
+    storage = LocalStorage(base_dir=tmp_path / "store")
+    source_path = tmp_path / "source.bin"
+    source_path.write_bytes(b"header|" + b"x" * 100_000)
+
+    with open(source_path, "rb") as source:
+        source.seek(7)
+        saved = storage.save_stream(root="docs", name="file.bin", source=source, length=100_000)
+        assert source.tell() == 100_007
+    assert storage.load_bytes(saved) == b"x" * 100_000
+
+    saved = storage.save_stream(root="docs", name="mem.bin", source=io.BytesIO(b"abcdef"), length=4)
+    assert storage.load_bytes(saved) == b"abcd"
+
+
+def test_local_load_bytes_falls_back_to_legacy_root(tmp_path) -> None:
+    import pytest
+
+    from app.services.storage import LocalStorage
+
+    storage = LocalStorage(base_dir=tmp_path / "_storage")
+    legacy = tmp_path / "storage" / "documents"
+    legacy.mkdir(parents=True)
+    (legacy / "old.pdf").write_bytes(b"%PDF legacy")
+    (storage.base_dir / "documents").mkdir()
+
+    assert storage.load_bytes("documents/old.pdf") == b"%PDF legacy"
+    assert (storage.base_dir / "documents" / "old.pdf").read_bytes() == b"%PDF legacy"
+    with pytest.raises(FileNotFoundError):
+        storage.load_bytes("documents/missing.pdf")
+    assert sorted(path.name for path in (storage.base_dir / "documents").iterdir()) == ["old.pdf"]
+
+
+def test_local_load_bytes_returns_legacy_bytes_when_migration_fails(tmp_path, monkeypatch) -> None:
+    from app.services import storage as storage_module
+
+    storage = storage_module.LocalStorage(base_dir=tmp_path / "_storage")
+    legacy = tmp_path / "storage" / "documents"
+    legacy.mkdir(parents=True)
+    (legacy / "old.pdf").write_bytes(b"%PDF legacy")
+
+    def failing_copy(src, dst) -> None:
+        dst.write_bytes(b"%PDF")
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(storage_module, "_fast_copy", failing_copy)
+
+    assert storage.load_bytes("documents/old.pdf") == b"%PDF legacy"
+    assert list((storage.base_dir / "documents").iterdir()) == []
+
+
+def test_fast_copy_copies_large_files(tmp_path) -> None:
+    from app.services.storage import _fast_copy
+
+    payload = bytes(range(256)) * 8192
+    (tmp_path / "src.bin").write_bytes(payload)
+    _fast_copy(tmp_path / "src.bin", tmp_path / "dst.bin")
+    assert (tmp_path / "dst.bin").read_bytes() == payload
+
+
+def test_local_batch_save_and_load_preserve_order(tmp_path) -> None:
+    from app.services.storage import LocalStorage
+
+    storage = LocalStorage(base_dir=tmp_path / "store")
+    items = [("batch", f"file-{index}.bin", bytes([index]) * (index + 1)) for index in range(5)]
+
+    paths = storage.save_bytes_many(items)
+
+    assert [path.rsplit("/", 1)[-1] for path in paths] == [name for _, name, _ in items]
+    assert storage.load_bytes_many(paths) == [data for _, _, data in items]
+
+
+def test_local_save_chunks_streams_and_cleans_up_on_failure(tmp_path) -> None:
+    import pytest
+
+    from app.services.storage import LocalStorage
+
+    storage = LocalStorage(base_dir=tmp_path)
+    saved = storage.save_chunks(root="sig", name="ok.pdf", chunks=iter([b"%PDF", b"-1.7", b""]))
+    assert storage.load_bytes(saved) == b"%PDF-1.7"
+
+    def broken():
+        yield b"%PDF"
+        raise ValueError("base64 inválido")
+
+    with pytest.raises(ValueError):
+        storage.save_chunks(root="sig", name="broken.pdf", chunks=broken())
+    assert not (tmp_path / "sig" / "broken.pdf").exists()
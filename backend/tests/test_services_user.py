@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from uuid import uuid4
+
+import pytest
+from sqlmodel import Session
+
+from app.models.tenant import Area, Tenant
+from app.models.user import UserRole
+from app.schemas.user import UserCreate, UserUpdate
+from app.services.user import UserService
+
+
+def _tenant_with_area(db: Session) -> tuple[Tenant, Area]:
+    tenant = Tenant(name="Tenant", slug=f"tenant-{uuid4().hex[:6]}")
+    db.add(tenant)
+    db.flush()
+    area = Area(name="Area", tenant_id=tenant.id)
+    db.add(area)
+    db.commit()
+    return tenant, area
+
+
+def _payload(area: Area, *, email: str, cpf: str) -> UserCreate:
+    return UserCreate(
+        email=email,
+        cpf=cpf,
+        full_name="Usuário",
+        password="secret",
+        profile=UserRole.USER,
+        default_area_id=area.id,
+    )
+
+
+def test_create_user_rejects_duplicate_cpf_in_tenant(db_session: Session) -> None:
+    tenant, area = _tenant_with_area(db_session)
+    svc = UserService(db_session)
+    svc.create_user(tenant.id, _payload(area, email="a@example.com", cpf="11122233344"))
+
+    with pytest.raises(ValueError, match="CPF"):
+        svc.create_user(tenant.id, _payload(area, email="b@example.com", cpf="11122233344"))
+    with pytest.raises(ValueError, match="e-mail"):
+        svc.create_user(tenant.id, _payload(area, email="a@example.com", cpf="55566677788"))
+
+
+def test_create_user_cancels_password_hash_when_validation_fails(db_session: Session, monkeypatch) -> None:
+    from concurrent.futures import Future
+
+    from app.services import user as user_module
+
+    started: list[Future] = []
+
+    def pending_hash(password: str) -> Future:
+        started.append(Future())
+        return started[-1]
+
+    monkeypatch.setattr(user_module, "_start_password_hash", pending_hash)
+    tenant, _ = _tenant_with_area(db_session)
+    _, foreign_area = _tenant_with_area(db_session)
+    svc = UserService(db_session)
+
+    with pytest.raises(ValueError, match="Area does not belong"):
+        svc.create_user(tenant.id, _payload(foreign_area, email="c@example.com", cpf="98798798798"))
+    assert len(started) == 1 and started[0].cancelled()
+
+
+def test_validate_area_is_cached_per_service_instance(db_session: Session, monkeypatch) -> None:
+    tenant, area = _tenant_with_area(db_session)
+    other_tenant, _ = _tenant_with_area(db_session)
+    svc = UserService(db_session)
+
+    assert svc._validate_area(area.id, tenant.id) == area.id
+    monkeypatch.setattr(db_session, "get", lambda *args, **kwargs: pytest.fail("area lookup not cached"))
+    assert svc._validate_area(str(area.id), tenant.id) == area.id
+    monkeypatch.undo()
+
+    with pytest.raises(ValueError, match="Area does not belong"):
+        svc._validate_area(area.id, other_tenant.id)
+
+
+def test_update_user_applies_only_fields_sent(db_session: Session) -> None:
+    tenant, area = _tenant_with_area(db_session)
+    svc = UserService(db_session)
+    user = svc.create_user(tenant.id, _payload(area, email="c@example.com", cpf="99988877766"))
+    original_hash = user.password_hash
+
+    updated = svc.update_user(
+        tenant.id, user, UserUpdate(phone_number="  +55 11 99999-0000 ", profile=UserRole.ADMIN)
+    )
+    assert updated.phone_number == "+55 11 99999-0000"
+    assert updated.profile == UserRole.ADMIN.value
+    assert (updated.full_name, updated.default_area_id) == ("Usuário", area.id)
+    assert updated.password_hash == original_hash
+
+    updated = svc.update_user(tenant.id, user, UserUpdate(password="nova-senha", phone_number=None))
+    assert updated.password_hash != original_hash and updated.must_change_password is False
+    assert updated.phone_number is None
+
+
+def test_reset_user_password_hashes_before_commit(db_session: Session) -> None:
+    from app.utils.security import verify_password
+
+    tenant, area = _tenant_with_area(db_session)
+    other_tenant, _ = _tenant_with_area(db_session)
+    svc = UserService(db_session)
+    user = svc.create_user(tenant.id, _payload(area, email="d@example.com", cpf="12312312312"))
+
+    with pytest.raises(ValueError, match="does not belong"):
+        svc.reset_user_password(user=user, actor_tenant_id=other_tenant.id)
+    temporary = svc.reset_user_password(user=user, actor_tenant_id=tenant.id, password_length=16)
+    assert len(temporary) == 16
+    assert user.must_change_password is True and verify_password(temporary, user.password_hash)
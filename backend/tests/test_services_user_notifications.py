@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlmodel import Session
+
+from app.models.notification import UserNotification
+from app.services.user_notifications import UserNotificationService
+
+
+def _seed_notifications(db: Session, *, total: int, read: int):
+    recipient_id = uuid4()
+    base = datetime(2024, 1, 1)
+    for index in range(total):
+        db.add(
+            UserNotification(
+                tenant_id=uuid4(),
+                document_id=uuid4(),
+                recipient_id=recipient_id,
+                event_type="document_signed",
+                created_at=base + timedelta(minutes=index),
+                read_at=base if index < read else None,
+            )
+        )
+    db.add(UserNotification(tenant_id=uuid4(), document_id=uuid4(), recipient_id=uuid4(), event_type="other"))
+    db.commit()
+    return recipient_id
+
+
+def test_list_notifications_returns_page_and_unread_count(db_session: Session) -> None:
+    recipient_id = _seed_notifications(db_session, total=5, read=2)
+    service = UserNotificationService(db_session)
+
+    items, unread = service.list_notifications(recipient_id=recipient_id, limit=2)
+    assert [item.created_at.minute for item in items] == [4, 3]
+    assert unread == 3
+
+    items, unread = service.list_notifications(recipient_id=recipient_id, limit=10, only_unread=True)
+    assert len(items) == 3 and all(item.read_at is None for item in items)
+    assert unread == 3
+
+    items, unread = service.list_notifications(recipient_id=recipient_id, limit=10, offset=50)
+    assert items == [] and unread == 3
+
+
+def test_mark_all_as_read_updates_only_unread_rows_of_recipient(db_session: Session) -> None:
+    recipient_id = _seed_notifications(db_session, total=4, read=1)
+    service = UserNotificationService(db_session)
+
+    assert service.mark_all_as_read(recipient_id=recipient_id) == 3
+    assert service.list_notifications(recipient_id=recipient_id)[1] == 0
+    assert service.mark_all_as_read(recipient_id=recipient_id) == 0
+
+
+def test_mark_as_read_stamps_naive_utc_once(db_session: Session) -> None:
+    recipient_id = _seed_notifications(db_session, total=1, read=0)
+    service = UserNotificationService(db_session)
+    notification = service.list_notifications(recipient_id=recipient_id)[0][0]
+
+    marked = service.mark_as_read(recipient_id=recipient_id, notification_id=notification.id)
+    first_read_at = marked.read_at
+    assert first_read_at is not None and first_read_at.tzinfo is None
+    assert service.mark_as_read(recipient_id=recipient_id, notification_id=notification.id).read_at == first_read_at
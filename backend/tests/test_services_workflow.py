@@ -10,7 +10,13 @@ from app.models.document import Document, DocumentParty, DocumentStatus, Documen
 from app.models.tenant import Area, Tenant
 from app.models.user import User
 from app.models.workflow import Signature, SignatureRequest, WorkflowStep
-from app.schemas.workflow import SignatureAction, WorkflowDispatch, WorkflowStepConfig, WorkflowTemplateCreate
+from app.schemas.workflow import (
+    SignatureAction,
+    WorkflowDispatch,
+    WorkflowStepConfig,
+    WorkflowTemplateCreate,
+    WorkflowTemplateUpdate,
+)
 from app.services.notification import NotificationService
 from app.services.storage import get_storage, normalize_storage_path
 from app.services.workflow import WorkflowService
@@ -237,3 +243,352 @@ def test_signature_action_captures_evidence(db_session: Session, workflow_contex
     assert evidence_log is not None
     assert evidence_log.details.get("typed_name") == typed_name
     assert evidence_log.details.get("image_artifact_id") == str(artifact.id)
+
+
+def test_group_dispatch_creates_one_request_per_step_and_document(db_session: Session, workflow_context: dict) -> None:
+    from app.models.document import DocumentGroup
+
+    tenant, area, user = workflow_context["tenant"], workflow_context["area"], workflow_context["user"]
+    group = DocumentGroup(tenant_id=tenant.id, area_id=area.id, owner_id=user.id, title="Lote")
+    db_session.add(group)
+    db_session.flush()
+    primary = workflow_context["document"]
+    primary.group_id = group.id
+    second = Document(
+        tenant_id=tenant.id,
+        area_id=area.id,
+        name="Anexo",
+        status=DocumentStatus.DRAFT,
+        created_by_id=user.id,
+        group_id=group.id,
+    )
+    approver = DocumentParty(
+        document_id=primary.id,
+        full_name="Approver",
+        email="approver@example.com",
+        role="approver",
+        order_index=2,
+    )
+    db_session.add_all([primary, second, approver])
+    db_session.flush()
+    db_session.add(DocumentParty(document_id=second.id, full_name="Stale", email="stale@example.com", role="signer"))
+    db_session.commit()
+
+    service = WorkflowService(db_session)
+    _, (workflow,) = service.dispatch_group_workflow(tenant.id, group.id, WorkflowDispatch())
+
+    steps = db_session.exec(
+        select(WorkflowStep).where(WorkflowStep.workflow_id == workflow.id).order_by(WorkflowStep.step_index)
+    ).all()
+    assert [step.step_index for step in steps] == [1, 2]
+    requests = db_session.exec(
+        select(SignatureRequest).where(SignatureRequest.workflow_step_id.in_([step.id for step in steps]))
+    ).all()
+    assert len(requests) == 4
+    assert {(request.workflow_step_id, request.document_id) for request in requests} == {
+        (step.id, document_id) for step in steps for document_id in (primary.id, second.id)
+    }
+    assert all(request.group_id == group.id for request in requests)
+    assert primary.status == second.status == DocumentStatus.IN_PROGRESS
+    db_session.expire_all()
+    assert db_session.get(Document, second.id).status == DocumentStatus.IN_PROGRESS
+    cloned = db_session.exec(
+        select(DocumentParty).where(DocumentParty.document_id == second.id).order_by(DocumentParty.order_index)
+    ).all()
+    assert [(party.full_name, party.email, party.role) for party in cloned] == [
+        ("Signer", "signer@example.com", "signer"),
+        ("Approver", "approver@example.com", "approver"),
+    ]
+
+
+@pytest.mark.parametrize(
+    ("raw", "expected"),
+    [
+        ("CN=MARIA SILVA:12345678901, CPF: 123.456.789-01", "12345678901"),
+        ("SERIALNUMBER=CPF 98765432100, O=ICP-Brasil", "98765432100"),
+        ("serialNumber=111.222.333-44", "11122233344"),
+        ("2.16.76.1.3.1 = 55566677788", "55566677788"),
+        ("cpf do titular - 000.111.222-33", "00011122233"),
+        ("Titular CPF nº 44455566677", "44455566677"),
+        ("CN=Empresa LTDA, O=ICP-Brasil", None),
+        ("12345678901", None),
+        ("   ", None),
+    ],
+)
+def test_extract_cpf_from_certificate_text(raw: str, expected: str | None) -> None:
+    assert WorkflowService._extract_cpf_from_text(raw) == expected
+
+
+def test_normalize_cpf_value_strips_formatting() -> None:
+    assert WorkflowService._normalize_cpf_value(" 123.456.789-01 ") == "12345678901"
+    assert WorkflowService._normalize_cpf_value("123.456.789") is None
+    assert WorkflowService._normalize_cpf_value(None) is None
+    assert WorkflowService._normalize_cpf_value("12345678901") == "12345678901"
+    assert WorkflowService._normalize_cpf_value("1234567890\u00b2") is None
+
+
+def test_template_steps_are_parsed_once_per_config(db_session: Session, workflow_context: dict, monkeypatch) -> None:
+    service = WorkflowService(db_session)
+    tenant, area = workflow_context["tenant"], workflow_context["area"]
+    template = service.create_template(
+        tenant.id,
+        area.id,
+        WorkflowTemplateCreate(
+            area_id=area.id,
+            name="Fluxo",
+            steps=[WorkflowStepConfig(order=2, role="approver"), WorkflowStepConfig(order=1, role="signer")],
+        ),
+    )
+
+    first = service._load_template_steps(template)
+    assert [step.role for step in first] == ["signer", "approver"]
+    first[0].role = "mutated"
+    monkeypatch.setattr(WorkflowService, "_parse_template_steps", staticmethod(lambda raw: pytest.fail("not cached")))
+    assert [step.role for step in service._load_template_steps(template)] == ["signer", "approver"]
+    monkeypatch.undo()
+
+    template.config_json = service._prepare_template_config([WorkflowStepConfig(order=1, role="witness")])
+    assert [step.role for step in service._load_template_steps(template)] == ["witness"]
+
+
+def test_dispatch_deadlines_share_workflow_start(db_session: Session, workflow_context: dict) -> None:
+    from datetime import timedelta
+
+    service = WorkflowService(db_session)
+    payload = WorkflowDispatch(steps=[WorkflowStepConfig(order=1, role="signer", deadline_hours=24)])
+    workflow = service.dispatch_workflow(workflow_context["tenant"].id, workflow_context["document"].id, payload)
+
+    (step,) = db_session.exec(select(WorkflowStep).where(WorkflowStep.workflow_id == workflow.id)).all()
+    assert step.deadline_at == workflow.started_at + timedelta(hours=24)
+
+
+def test_token_lookup_loads_step_and_party_eagerly(db_session: Session, workflow_context: dict) -> None:
+    from sqlalchemy import inspect as sa_inspect
+
+    service = WorkflowService(db_session)
+    workflow = service.dispatch_workflow(
+        workflow_context["tenant"].id, workflow_context["document"].id, WorkflowDispatch()
+    )
+    (step,) = db_session.exec(select(WorkflowStep).where(WorkflowStep.workflow_id == workflow.id)).all()
+    (request,) = db_session.exec(select(SignatureRequest).where(SignatureRequest.workflow_step_id == step.id)).all()
+    token = service.issue_signature_token(request.id)
+    db_session.commit()
+    db_session.expunge_all()
+
+    found = service._find_request_by_token(token)
+    assert "step" not in sa_inspect(found).unloaded
+    assert "party" not in sa_inspect(found.step).unloaded
+    assert found.step.party.email == "signer@example.com"
+
+
+def test_find_request_by_token_rejects_non_ascii_tokens(db_session: Session) -> None:
+    service = WorkflowService(db_session)
+    with pytest.raises(ValueError, match="Invalid token"):
+        service._find_request_by_token("tokén-inválido")
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_template_config_round_trip(db_session: Session, monkeypatch, use_orjson: bool) -> None:
+    from app.services import workflow as workflow_module
+
+    if not use_orjson:
+        monkeypatch.setattr(workflow_module, "orjson", None)
+    service = WorkflowService(db_session)
+    steps = [WorkflowStepConfig(order=1, role="signer", representative_name="José Ávila", deadline_hours=48)]
+
+    config_json = service._prepare_template_config(steps)
+    assert [step.model_dump() for step in WorkflowService._parse_template_steps(config_json)] == [
+        step.model_dump() for step in steps
+    ]
+    with pytest.raises(ValueError, match="Invalid template configuration"):
+        WorkflowService._parse_template_steps("{not json")
+
+
+def test_list_templates_streams_active_templates(db_session: Session, workflow_context: dict, monkeypatch) -> None:
+    monkeypatch.setattr(WorkflowService, "LIST_BATCH_SIZE", 2)
+    service = WorkflowService(db_session)
+    tenant, area = workflow_context["tenant"], workflow_context["area"]
+    created = [
+        service.create_template(
+            tenant.id,
+            area.id,
+            WorkflowTemplateCreate(area_id=area.id, name=f"Fluxo {index}", steps=[WorkflowStepConfig(order=1, role="signer")]),
+        )
+        for index in range(5)
+    ]
+    service.deactivate_template(tenant.id, created[0].id)
+
+    assert {template.id for template in service.list_templates(tenant.id)} == {t.id for t in created[1:]}
+    assert len(list(service.list_templates(tenant.id, area.id, include_inactive=True))) == 5
+
+
+def test_update_template_skips_commit_when_nothing_changes(
+    db_session: Session, workflow_context: dict, monkeypatch
+) -> None:
+    service = WorkflowService(db_session)
+    tenant, area = workflow_context["tenant"], workflow_context["area"]
+    steps = [WorkflowStepConfig(order=1, role="signer")]
+    template = service.create_template(tenant.id, area.id, WorkflowTemplateCreate(area_id=area.id, name="Fluxo", steps=steps))
+
+    with monkeypatch.context() as patched:
+        patched.setattr(db_session, "commit", lambda: pytest.fail("no-op update must not commit"))
+        same = service.update_template(tenant.id, template.id, WorkflowTemplateUpdate(name="Fluxo", steps=steps))
+        assert same is template
+
+    renamed = service.update_template(tenant.id, template.id, WorkflowTemplateUpdate(name="Fluxo novo", is_active=True))
+    assert renamed.name == "Fluxo novo"
+    db_session.expire_all()
+    assert service.get_template(template.id).name == "Fluxo novo"
+
+
+def test_decode_signature_image_handles_data_uri_and_rejects_garbage() -> None:
+    raw = b"\x89PNG\r\n\x1a\nimagem"
+    encoded = base64.b64encode(raw).decode()
+
+    assert WorkflowService._decode_signature_image(f"data:image/png;base64,{encoded}") == (raw, "image/png")
+    assert WorkflowService._decode_signature_image(encoded) == (raw, None)
+    with pytest.raises(ValueError, match="formato inválido"):
+        WorkflowService._decode_signature_image("data:image/png;base64")
+    with pytest.raises(ValueError, match="base64"):
+        WorkflowService._decode_signature_image(f"data:image/png,{encoded}")
+    with pytest.raises(ValueError, match="inválida"):
+        WorkflowService._decode_signature_image("não é base64!")
+
+
+def test_b64decode_chunks_matches_one_shot_decode() -> None:
+    from app.services.workflow import _b64decode_chunks
+
+    payload = bytes(range(256)) * 700 + b"fim"
+    encoded = base64.b64encode(payload).decode()
+    assert b"".join(_b64decode_chunks(encoded, chunk_chars=4096)) == payload
+    with pytest.raises(ValueError):
+        list(_b64decode_chunks(encoded[:4096] + "!!!!", chunk_chars=4096))
+
+
+def test_resend_pending_notifications_loads_steps_once(db_session: Session, workflow_context: dict, monkeypatch) -> None:
+    class RecordingNotifier:
+        def __init__(self) -> None:
+            self.sent: list[tuple] = []
+
+        def notify_signature_request(self, *, request, party, document, token, step, requester_name) -> None:
+            self.sent.append((request.id, party.email, document.id, requester_name))
+
+    notifier = RecordingNotifier()
+    service = WorkflowService(db_session, notification_service=notifier)  # type: ignore[arg-type]
+    tenant, document = workflow_context["tenant"], workflow_context["document"]
+    db_session.add(
+        DocumentParty(document_id=document.id, full_name="Second", email="second@example.com", role="signer", order_index=2)
+    )
+    db_session.commit()
+    service.dispatch_workflow(tenant.id, document.id, WorkflowDispatch())
+    notifier.sent.clear()
+
+    lookups: list = []
+    monkeypatch.setattr(service, "_resolve_company_name", lambda tenant_id: lookups.append(tenant_id) or "Empresa")
+    notified = service.resend_pending_notifications(tenant.id, document.id)
+
+    assert notified == 2
+    assert [(email, document_id, name) for _, email, document_id, name in notifier.sent] == [
+        ("signer@example.com", document.id, "Empresa"),
+        ("second@example.com", document.id, "Empresa"),
+    ]
+    assert lookups == [tenant.id]
+
+
+def _attach_current_version(db_session: Session, workflow_context: dict) -> None:
+    document = workflow_context["document"]
+    version = DocumentVersion(
+        document_id=document.id,
+        storage_path="documents/original.pdf",
+        original_filename="contrato.pdf",
+        mime_type="application/pdf",
+        size_bytes=0,
+        sha256="0" * 64,
+        uploaded_by_id=workflow_context["user"].id,
+    )
+    db_session.add(version)
+    db_session.flush()
+    document.current_version_id = version.id
+    db_session.add(document)
+    db_session.commit()
+
+
+def test_signature_method_is_validated_before_evidence_is_stored(
+    db_session: Session, workflow_context: dict, monkeypatch
+) -> None:
+    import app.services.workflow as workflow_module
+
+    service = WorkflowService(db_session)
+    tenant, document = workflow_context["tenant"], workflow_context["document"]
+    _attach_current_version(db_session, workflow_context)
+    service.dispatch_workflow(tenant.id, document.id, WorkflowDispatch())
+    request = db_session.exec(select(SignatureRequest)).first()
+
+    def unexpected_storage():
+        raise AssertionError("storage must not be touched before validation")
+
+    monkeypatch.setattr(workflow_module, "get_storage", unexpected_storage)
+    action = SignatureAction(
+        action="sign",
+        signature_image="não-é-base64",
+        consent=True,
+        certificate_subject="CN=MARIA SILVA:12345678901",
+    )
+    with pytest.raises(ValueError, match="forma eletrônica"):
+        service.record_signature_action(tenant_id=tenant.id, request_id=request.id, payload=action)
+
+
+def test_build_signature_filename_replaces_path_separators() -> None:
+    request_id = uuid4()
+    assert WorkflowService._build_signature_filename("..\\pasta/assinatura", ".png", request_id) == ".._pasta_assinatura"
+    assert WorkflowService._build_signature_filename("a/b\\c", ".png", request_id) == "a_b_c.png"
+    assert WorkflowService._build_signature_filename("  ", ".jpg", request_id) == f"assinatura-{request_id}.jpg"
+
+
+
+def test_failed_signed_pdf_discards_uploaded_signature_image(
+    db_session: Session, workflow_context: dict, monkeypatch
+) -> None:
+    import app.services.workflow as workflow_module
+
+    class RecordingStorage:
+        def __init__(self) -> None:
+            self.saved: list[str] = []
+            self.deleted: list[str] = []
+
+        def save_bytes(self, *, root: str, name: str, data: bytes) -> str:
+            self.saved.append(f"{root}/{name}")
+            return self.saved[-1]
+
+        def save_chunks(self, *, root: str, name: str, chunks) -> str:
+            for _ in chunks:
+                pass
+            return f"{root}/{name}"
+
+        def delete(self, path: str) -> None:
+            self.deleted.append(path)
+
+    storage = RecordingStorage()
+    monkeypatch.setattr(workflow_module, "get_storage", lambda: storage)
+    service = WorkflowService(db_session)
+    tenant, document, party = workflow_context["tenant"], workflow_context["document"], workflow_context["party"]
+    party.signature_method = "digital"
+    party.cpf = "12345678901"
+    db_session.add(party)
+    _attach_current_version(db_session, workflow_context)
+    service.dispatch_workflow(tenant.id, document.id, WorkflowDispatch())
+    request = db_session.exec(select(SignatureRequest)).first()
+
+    action = SignatureAction(
+        action="sign",
+        signature_image=base64.b64encode(b"fake-image-bytes").decode("ascii"),
+        signature_image_mime="image/png",
+        consent=True,
+        certificate_subject="CN=MARIA SILVA, CPF: 123.456.789-01",
+        signed_pdf="%%% não é base64 %%%",
+    )
+    with pytest.raises(ValueError, match="PDF assinado em formato inválido"):
+        service.record_signature_action(tenant_id=tenant.id, request_id=request.id, payload=action)
+
+    # Upload cancelado antes de rodar, ou gravado e removido: nunca sobra imagem órfã.
+    assert storage.deleted == storage.saved
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import base64
+import json
+
+import httpx
+
+from app.services.signing_agent import SigningAgentClient, build_sign_pdf_payload
+
+
+def _client_with_transport(handler) -> SigningAgentClient:
+    client = SigningAgentClient("http://agent.test")
+    client._client = httpx.Client(base_url="http://agent.test", transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_signing_agent_clients_share_connection_pool() -> None:
+    first = SigningAgentClient("http://agent.test", timeout_seconds=5)
+    second = SigningAgentClient("http://agent.test/", timeout_seconds=5)
+    assert first._client is second._client
+    assert SigningAgentClient("http://other.test", timeout_seconds=5)._client is not first._client
+
+
+def test_signing_agent_request_uses_base_url() -> None:
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(str(request.url))
+        return httpx.Response(200, json={"status": "ok", "echo": json.loads(request.content or b"null")})
+
+    client = _client_with_transport(handler)
+
+    assert client.status() == {"status": "ok", "echo": None}
+    assert client.sign_pdf({"payload": base64.b64encode(b"%PDF").decode()})["echo"] == {"payload": "JVBERg=="}
+    assert seen == ["http://agent.test/status", "http://agent.test/sign/pdf"]
+
+
+def test_signing_agent_dispatches_on_content_type() -> None:
+    bodies = {
+        "/pdf": (b"%PDF-1.7 signed", "application/pdf"),
+        "/p7s": (b"\x30\x82signed-data", "application/pkcs7-signature"),
+        "/raw": (b"%PDF-1.4 sniffed", ""),
+        "/b64": (base64.b64encode(b"%PDF-1.4 " + b"x" * 4096), "text/plain"),
+    }
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body, content_type = bodies[request.url.path]
+        headers = {"content-type": content_type} if content_type else {}
+        return httpx.Response(200, content=body, headers=headers)
+
+    client = _client_with_transport(handler)
+
+    assert client._request("GET", "/pdf") == {"pdf": base64.b64encode(b"%PDF-1.7 signed").decode(), "p7s": None}
+    assert client._request("GET", "/p7s") == {"pdf": None, "p7s": base64.b64encode(b"\x30\x82signed-data").decode()}
+    assert client._request("GET", "/raw")["pdf"] == base64.b64encode(b"%PDF-1.4 sniffed").decode()
+    assert client._request("GET", "/b64")["pdf"] == base64.b64encode(b"%PDF-1.4 " + b"x" * 4096).decode()
+
+
+def test_build_sign_pdf_payload_skips_unset_options() -> None:
+    payload = build_sign_pdf_payload(pdf_bytes=b"%PDF", cert_index=0, protocol="P-1", signature_width=0.0, actions=["sign", ""])
+
+    assert payload == {
+        "payload": base64.b64encode(b"%PDF").decode(),
+        "certIndex": 0,
+        "protocol": "P-1",
+        "signatureWidth": 0.0,
+        "actions": ["sign"],
+    }